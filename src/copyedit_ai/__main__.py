@@ -3,41 +3,127 @@
 Copyedit text from the CLI using AI
 """
 
+import asyncio
+import functools
+import hashlib
 import json
 import os
 import shutil
 import sys
 import tempfile
+import threading
+import time
 from importlib.metadata import version as get_version
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any, BinaryIO, cast
 
 import click
-import llm
-import mdformat
 import typer
 import typer.main
-from click_default_group import DefaultGroup
-from rich.console import Console
-from rich.status import Status
 
 from .logging_config import get_logger, setup_logging
 
+# llm, rich, and click_default_group are imported where they are used so
+# that commands which never touch them (help, version, self) start quickly.
 if TYPE_CHECKING:
+    import llm
     from click import Context, Parameter
+    from click_default_group import DefaultGroup
+    from rich.console import Console
+    from rich.progress import Progress
+
+    from .cache import CachedResponse, CachingResponse
+    from .settings import Settings
 
-from .copyedit import copyedit, templates_installed
 from .schemas import get_copyedit_schema
 from .self_subcommand import cli as self_cli
-from .settings import Settings
-from .user_dir import get_app_config_dir
+from .user_dir import get_app_cache_dir, get_app_config_dir
 
-console = Console(stderr=True)
 logger = get_logger("copyedit")
 
 app = typer.Typer()
 
 
+@functools.cache
+def _get_console() -> "Console":
+    """Return the shared stderr console, creating it on first use."""
+    from rich.console import Console  # noqa: PLC0415
+
+    return Console(stderr=True)
+
+
+# How long the on-disk model display-name index stays valid, in seconds
+MODEL_INDEX_TTL = 60 * 60
+MODEL_INDEX_FILENAME = "models.json"
+
+
+def _model_index_key() -> str:
+    """Identify the installed model set for the on-disk model index.
+
+    The key changes whenever a plugin is installed, removed, or upgraded,
+    or when the user's aliases change.
+    """
+    import llm  # noqa: PLC0415
+
+    plugins = sorted(
+        f"{plugin['name']}=={plugin.get('version', '')}" for plugin in llm.get_plugins()
+    )
+    aliases_path = llm.user_dir() / "aliases.json"
+    try:
+        aliases_mtime = aliases_path.stat().st_mtime_ns
+    except OSError:
+        aliases_mtime = 0
+    return json.dumps([str(aliases_path), aliases_mtime, plugins])
+
+
+def _build_model_index() -> dict[str, str]:
+    """Map every lowercased model id and alias to its short display name."""
+    import llm  # noqa: PLC0415
+
+    index: dict[str, str] = {}
+    for model_with_alias in llm.get_models_with_aliases():
+        model_id = model_with_alias.model.model_id
+        # Prefer the shortest alias; llm returns aliases in no particular order
+        display_name = (
+            min(model_with_alias.aliases, key=lambda alias: (len(alias), alias))
+            if model_with_alias.aliases
+            else model_id
+        )
+        for name in (model_id, *model_with_alias.aliases):
+            index.setdefault(name.lower(), display_name)
+    return index
+
+
+@functools.cache
+def _model_display_index() -> dict[str, str]:
+    """Return the model display-name index, built at most once per process.
+
+    Enumerating models walks every installed plugin, so the index is also
+    persisted in the cache directory and reused by later invocations until
+    it expires or the plugin set changes.
+    """
+    cache_path = get_app_cache_dir() / MODEL_INDEX_FILENAME
+    key = _model_index_key()
+
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        if cached["key"] == key and time.time() - cached["created"] < MODEL_INDEX_TTL:
+            return cached["index"]
+    except (OSError, ValueError, KeyError, TypeError):
+        logger.debug("No usable model index cache at {}", cache_path)
+
+    index = _build_model_index()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(
+            json.dumps({"key": key, "created": time.time(), "index": index}),
+            encoding="utf-8",
+        )
+    except OSError as e:
+        logger.debug("Could not write model index cache: {}", e)
+    return index
+
+
 def _get_model_display_name(model_name: str) -> str:
     """Get a short display name for a model (alias if available, otherwise model_id).
 
@@ -49,23 +135,10 @@ def _get_model_display_name(model_name: str) -> str:
 
     """
     try:
-        models_with_aliases = llm.get_models_with_aliases()
-        for model_with_alias in models_with_aliases:
-            if model_with_alias.matches(model_name):
-                # Return first alias if available
-                # (aliases are usually sorted shortest first)
-                if model_with_alias.aliases:
-                    return min(
-                        model_with_alias.aliases, key=lambda alias: (len(alias), alias)
-                    )
-                # Fall back to model_id
-                return model_with_alias.model.model_id
-    except Exception:  # noqa: S110
+        return _model_display_index().get(model_name.lower(), model_name)
+    except Exception:
         # If anything goes wrong, just return the original name
-        pass
-
-    # Default: return the model_name as-is
-    return model_name
+        return model_name
 
 
 # Register subcommands
@@ -80,7 +153,9 @@ class StructuredOutputError(ValueError):
     """Raised when a model does not return the requested JSON structure."""
 
 
-def _get_structured_output(response: llm.Response) -> tuple[dict[str, Any], str]:
+def _get_structured_output(
+    response: "llm.Response | CachedResponse | CachingResponse",
+) -> tuple[dict[str, Any], str]:
     """Return and validate the structured model response."""
     output_data = response.json()
     if output_data is None:
@@ -138,6 +213,21 @@ def version_command() -> None:
         raise typer.Exit(code=1) from None
 
 
+def _format_markdown(text: str, wrap_width: int) -> str:
+    """Normalize Markdown and wrap it to the given width with mdformat.
+
+    mdformat and its markdown-it parser are only needed when output is
+    formatted, so they are imported here rather than at startup.
+    """
+    import mdformat  # noqa: PLC0415
+
+    return mdformat.text(
+        text,
+        options={"wrap": wrap_width},
+        extensions={"front_matters", "footnote"},
+    )
+
+
 def _check_word_wrapping_applied(
     text: str, wrap_width: int, markdown_enabled: bool
 ) -> None:
@@ -181,14 +271,223 @@ def _check_word_wrapping_applied(
                 tolerance,
             )
             # Rich Console (configured with stderr=True) prints to stderr by default
-            console.print(
+            _get_console().print(
                 f"[yellow]Warning:[/yellow] Some lines exceed the wrap width of "
                 f"{wrap_width} characters. The content may not be properly wrapped."
             )
 
 
+# Buffer size for writing streamed output to the replacement temp file
+STREAM_BUFFER_SIZE = 64 * 1024
+# Streamed console output is written once this many bytes are pending...
+STDOUT_BUFFER_SIZE = 8 * 1024
+# ...or once this many seconds have passed since the last write
+STDOUT_FLUSH_INTERVAL = 0.025
+
+
+class _BufferedStreamWriter:
+    """Batch streamed response chunks into fewer writes on a binary stream.
+
+    Echoing every token costs an encode, a write and a flush per chunk. This
+    writer accumulates encoded chunks and writes them when the buffer fills
+    or the flush interval has elapsed. A timer flushes chunks still held
+    back when the interval is up, so output appears promptly even if the
+    model pauses after them.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        buffer_size: int = STDOUT_BUFFER_SIZE,
+        flush_interval: float = STDOUT_FLUSH_INTERVAL,
+    ) -> None:
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._last_flush = time.monotonic()
+        # Guards the buffer and stream against the flush timer's thread
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def write(self, chunk: str) -> None:
+        """Buffer a chunk, flushing when the buffer is full or the interval is up."""
+        with self._lock:
+            self._buffer += chunk.encode("utf-8")
+            elapsed = time.monotonic() - self._last_flush
+            if (
+                len(self._buffer) >= self._buffer_size
+                or elapsed >= self._flush_interval
+            ):
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(
+                    self._flush_interval - elapsed, self.flush
+                )
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Write any buffered bytes to the underlying stream."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer:
+            self._stream.write(self._buffer)
+            self._buffer.clear()
+        self._stream.flush()
+        self._last_flush = time.monotonic()
+
+
+class _NullStatus:
+    """Stand-in for a Rich Status spinner when stderr is not a terminal."""
+
+    def start(self) -> None:
+        """Do nothing."""
+
+    def stop(self) -> None:
+        """Do nothing."""
+
+
+def _make_replacement_temp_file(file_path: Path) -> Path:
+    """Create a secure temporary file to hold the copyedited version.
+
+    The file is created, hidden, next to the original so that it can later
+    be renamed over it without copying.
+
+    Args:
+        file_path: The file that is being copyedited.
+
+    Returns:
+        Path to the new, empty temporary file.
+
+    """
+    temp_fd, temp_path_str = tempfile.mkstemp(
+        suffix=file_path.suffix,
+        prefix=f".{file_path.stem}_copyedit_",
+        dir=file_path.parent,
+        text=True,
+    )
+    os.close(temp_fd)  # Close fd, we'll use Path.open() instead
+    return Path(temp_path_str)
+
+
+def _same_file_content(path_a: Path, path_b: Path) -> bool:
+    """Check whether two files hold byte-identical content.
+
+    Sizes are compared first so that differing files are usually rejected
+    without reading them; otherwise both are hashed in a streaming fashion.
+
+    Args:
+        path_a: First file to compare.
+        path_b: Second file to compare.
+
+    Returns:
+        True if the files have the same content.
+
+    """
+    if path_a.stat().st_size != path_b.stat().st_size:
+        return False
+    digests = []
+    for path in (path_a, path_b):
+        with path.open("rb") as f:
+            digests.append(hashlib.file_digest(f, "blake2b").digest())
+    return digests[0] == digests[1]
+
+
+def _backup_file(file_path: Path, backup_path: Path, *, link: bool = True) -> None:
+    """Keep the current contents of a file at a backup path.
+
+    A hard link shares the existing data, so no bytes are copied. Where
+    hard links are unavailable (some filesystems, Windows shares) the file
+    is copied instead.
+
+    Args:
+        file_path: The file to back up.
+        backup_path: Where the backup should be kept. Replaced if it exists.
+        link: Whether a hard link may be used. Must be False when the
+            original is about to be rewritten in place.
+
+    """
+    backup_path.unlink(missing_ok=True)
+    if link:
+        try:
+            os.link(file_path, backup_path)
+        except OSError:
+            pass
+        else:
+            return
+    shutil.copy2(file_path, backup_path)
+
+
+def _has_xattrs(path: Path) -> bool:
+    """Check whether a file carries extended attributes (including ACLs).
+
+    Platforms without os.listxattr are treated as having none.
+    """
+    listxattr = getattr(os, "listxattr", None)
+    if listxattr is None:
+        return False
+    try:
+        return bool(listxattr(path))
+    except OSError:
+        return False
+
+
+def _can_rename_over(file_path: Path, temp_path: Path) -> bool:
+    """Check whether renaming temp_path over file_path loses nothing.
+
+    A rename swaps in a new inode: other hard links keep the old content,
+    and the new file has the temp file's owner and group and no extended
+    attributes or ACLs.
+
+    Args:
+        file_path: The (already resolved) file being replaced.
+        temp_path: The temporary file holding the new content.
+
+    Returns:
+        True if the rename is equivalent to rewriting the original.
+
+    """
+    original = file_path.stat()
+    temp = temp_path.stat()
+    return (
+        original.st_nlink == 1
+        and (original.st_uid, original.st_gid) == (temp.st_uid, temp.st_gid)
+        and not _has_xattrs(file_path)
+    )
+
+
+def _replace_file(file_path: Path, temp_path: Path, *, rename: bool) -> None:
+    """Put the copyedited content from temp_path into file_path.
+
+    Args:
+        file_path: The (already resolved) file being replaced.
+        temp_path: The temporary file holding the new content. Consumed.
+        rename: Atomically rename temp_path over file_path, keeping the
+            original's permissions. Otherwise the content is written
+            through the original inode, preserving hard links, owner,
+            ACLs and extended attributes.
+
+    """
+    if rename:
+        shutil.copymode(file_path, temp_path)
+        temp_path.replace(file_path)
+        return
+    with temp_path.open("rb") as src, file_path.open("r+b") as dst:
+        shutil.copyfileobj(src, dst)
+        dst.truncate()
+        dst.flush()
+        os.fsync(dst.fileno())
+    temp_path.unlink()
+
+
 def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
-    settings: Settings,
+    settings: "Settings",
     file_path: Path | None,
     model: str | None,
     stream: bool,
@@ -196,11 +495,19 @@ def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
     json_output: bool,
     wrap_width: int,
     markdown: bool,
+    *,
+    cache: bool = False,
 ) -> None:
     """Perform copyediting operation.
 
     Helper function to handle the actual copyediting logic.
     """
+    import llm  # noqa: PLC0415
+    from rich.status import Status  # noqa: PLC0415
+
+    from .cache import CachedResponse, CachingResponse  # noqa: PLC0415
+    from .copyedit import copyedit  # noqa: PLC0415
+
     if replace and not file_path:
         logger.error("Cannot use --replace with stdin input")
         typer.echo(
@@ -209,6 +516,20 @@ def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
         )
         raise typer.Exit(1)
 
+    # Replacement works on the real file, so a symlinked input stays a
+    # symlink and its target is the one that gets edited
+    target_path = file_path.resolve() if replace and file_path else None
+
+    # The temp file and backup are created next to the original, so find
+    # out now rather than after paying for the LLM call
+    if target_path and not os.access(target_path.parent, os.W_OK):
+        logger.error("Cannot write to directory: {}", target_path.parent)
+        typer.echo(
+            f"Error: --replace requires write access to {target_path.parent}",
+            err=True,
+        )
+        raise typer.Exit(1)
+
     # Use default model from settings if not provided
     model_name = model or settings.default_model
 
@@ -216,10 +537,10 @@ def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
     source_name = str(file_path) if file_path else "stdin"
     if file_path:
         logger.info("Reading from file: {}", file_path)
-        text = file_path.read_text()
+        text = file_path.read_bytes().decode("utf-8")
     else:
         logger.info("Reading from stdin")
-        text = sys.stdin.read()
+        text = sys.stdin.buffer.read().decode("utf-8")
 
     if not text.strip():
         logger.error("No input text provided")
@@ -237,17 +558,23 @@ def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
             actual_model_name = "default"
 
     model_display = _get_model_display_name(actual_model_name)
+    console = _get_console()
     console.print(
         f"[bold blue]Copyediting:[/bold blue] {source_name} "
         f"[dim](model: {model_display})[/dim]"
     )
 
-    # Perform copyediting with spinner
+    # Perform copyediting with spinner. When stderr is piped or redirected
+    # the animation is never seen, so skip its refresh thread entirely.
     try:
-        status = Status(
-            "[bold green]Generating copyedited version...",
-            console=console,
-            spinner="dots",
+        status: Status | _NullStatus = (
+            Status(
+                "[bold green]Generating copyedited version...",
+                console=console,
+                spinner="dots",
+            )
+            if console.is_terminal
+            else _NullStatus()
         )
         status.start()
 
@@ -256,17 +583,27 @@ def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
             model_name=model_name,
             stream=stream and not json_output,
             schema=get_copyedit_schema() if json_output else None,
+            cache=cache,
         )
+        if isinstance(response, CachedResponse):
+            logger.info("Serving cached response")
+            console.print(
+                "[dim]Using a cached response; pass --no-cache to ask the "
+                "model again.[/dim]"
+            )
 
         # Collect the output
         output_text = ""
+        temp_path: Path | None = None
         if json_output:
-            assert isinstance(response, llm.Response)  # noqa: S101
+            assert isinstance(  # noqa: S101
+                response, (llm.Response, CachedResponse, CachingResponse)
+            )
             output_data, output_text = _get_structured_output(response)
             status.stop()
             if not replace:
                 typer.echo(json.dumps(output_data, ensure_ascii=False, indent=2))
-        elif stream:
+        elif stream and not replace:
             if markdown:
                 logger.warning(
                     "Streaming output response does not "
@@ -285,45 +622,52 @@ def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
                     fg="yellow",
                 )
 
-            # Stream output and collect it
-            chunks = []
+            # Stream straight to stdout; nothing reads the text afterwards,
+            # so the chunks are not retained
+            writer = _BufferedStreamWriter(click.get_binary_stream("stdout"))
             first_chunk = True
             for chunk in response:
-                # Stop spinner on first chunk for non-replace mode
-                if first_chunk and not replace:
+                # Stop spinner on first chunk
+                if first_chunk:
                     status.stop()
                     first_chunk = False
-
-                chunks.append(chunk)
-                if not replace:
-                    # Only print to stdout if not replacing
-                    typer.echo(chunk, nl=False)
-
-            output_text = "".join(chunks)
-            if markdown:
-                output_text = mdformat.text(
-                    output_text,
-                    options={"wrap": wrap_width},
-                    extensions={"front_matters", "footnote"},
-                )
-                # Check if wrapping was properly applied
-                _check_word_wrapping_applied(output_text, wrap_width, markdown)
-            if not replace:
-                typer.echo()  # Final newline
-            else:
-                # Stop spinner after collecting all chunks in replace mode
-                status.stop()
+                writer.write(chunk)
+            writer.flush()
+            status.stop()
+            typer.echo()  # Final newline
+        elif stream:
+            assert file_path is not None  # Validated at function start  # noqa: S101
+            # Write the streamed output to the replacement file as it arrives.
+            # Markdown formatting needs the whole text, so it is collected first.
+            assert target_path is not None  # Set whenever replace is  # noqa: S101
+            temp_path = _make_replacement_temp_file(target_path)
+            try:
+                with temp_path.open("w", buffering=STREAM_BUFFER_SIZE) as temp_file:
+                    if markdown:
+                        output_text = _format_markdown("".join(response), wrap_width)
+                        # Check if wrapping was properly applied
+                        _check_word_wrapping_applied(output_text, wrap_width, markdown)
+                        temp_file.write(output_text)
+                    else:
+                        for chunk in response:
+                            temp_file.write(chunk)
+                    # Make the content durable before it can replace the original
+                    temp_file.flush()
+                    os.fsync(temp_file.fileno())
+            except BaseException:
+                temp_path.unlink(missing_ok=True)
+                raise
+            # Stop spinner after collecting all chunks
+            status.stop()
         else:
             # Output complete response
             # Type assertion: in non-streaming mode, response is always Response
-            assert isinstance(response, llm.Response)  # noqa: S101
+            assert isinstance(  # noqa: S101
+                response, (llm.Response, CachedResponse, CachingResponse)
+            )
             output_text = response.text()
             if markdown:
-                output_text = mdformat.text(
-                    output_text,
-                    options={"wrap": wrap_width},
-                    extensions={"front_matters", "footnote"},
-                )
+                output_text = _format_markdown(output_text, wrap_width)
                 # Check if wrapping was properly applied
                 _check_word_wrapping_applied(output_text, wrap_width, markdown)
             # Stop spinner after API call completes
@@ -331,21 +675,28 @@ def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
             if not replace:
                 typer.echo(output_text)
 
+        # The output has now been read in full and, for --json, validated;
+        # only now may later runs replay it
+        if isinstance(response, CachingResponse):
+            response.save()
+
         # Handle replace mode
         if replace:
-            assert file_path is not None  # Validated at function start  # noqa: S101
-            # Write to secure temporary file
-            temp_fd, temp_path_str = tempfile.mkstemp(
-                suffix=file_path.suffix,
-                prefix=f"{file_path.stem}_copyedit_",
-                text=True,
-            )
-
-            os.close(temp_fd)  # Close fd, we'll use Path.open() instead
-            temp_path = Path(temp_path_str)
+            assert target_path is not None  # Validated at function start  # noqa: S101
             try:
-                with temp_path.open("w") as temp_file:
-                    temp_file.write(output_text)
+                if temp_path is None:
+                    # Write to secure temporary file
+                    temp_path = _make_replacement_temp_file(target_path)
+                    with temp_path.open("w") as temp_file:
+                        temp_file.write(output_text)
+                        temp_file.flush()
+                        os.fsync(temp_file.fileno())
+
+                if _same_file_content(temp_path, target_path):
+                    temp_path.unlink()
+                    logger.info("No changes to {}; leaving it untouched", file_path)
+                    typer.echo(f"\nNo changes needed: {file_path} is unchanged.")
+                    return
 
                 logger.info("Wrote copyedited content to temporary file: {}", temp_path)
 
@@ -358,14 +709,18 @@ def _perform_copyedit(  # noqa: C901, PLR0912, PLR0913, PLR0915
                 )
 
                 if confirm:
-                    # Create backup of original file
-                    backup_path = file_path.with_suffix(file_path.suffix + ".bak")
-                    shutil.copy2(file_path, backup_path)
+                    # Decide before backing up: a hard-linked backup would
+                    # itself add a link to the original
+                    rename = _can_rename_over(target_path, temp_path)
+
+                    # Create backup of original file. Rewriting in place
+                    # would change a hard-linked backup too, so copy then
+                    backup_path = target_path.with_suffix(target_path.suffix + ".bak")
+                    _backup_file(target_path, backup_path, link=rename)
                     logger.info("Created backup: {}", backup_path)
 
-                    # Replace original with temp file
-                    shutil.copy2(temp_path, file_path)
-                    logger.info("Replaced {} with copyedited version", file_path)
+                    _replace_file(target_path, temp_path, rename=rename)
+                    logger.info("Replaced {} with copyedited version", target_path)
 
                     typer.secho(
                         f"✓ File replaced successfully. Backup saved to: {backup_path}",
@@ -404,7 +759,13 @@ def main_callback(
     ),
 ) -> None:
     """Copyedit text from the CLI using AI"""
-    ctx.obj = Settings()
+    # Shell completion only needs the command tree, not settings or logging
+    if ctx.resilient_parsing:
+        return
+
+    from .settings import get_settings  # noqa: PLC0415
+
+    ctx.obj = get_settings()
     debug = debug or ctx.obj.debug
     log_path = log_file or ctx.obj.log_file
 
@@ -425,6 +786,25 @@ def main_callback(
     else:
         logger.disable("copyedit_ai")
 
+    # Reading the templates directory is only worthwhile where the user
+    # can act on the result, so other commands skip it
+    if ctx.invoked_subcommand == "self":
+        _log_template_status()
+
+
+def _log_template_status() -> None:
+    """Log whether the copyedit template is installed."""
+    from .copyedit import templates_installed  # noqa: PLC0415
+
+    existing_templates = templates_installed()
+
+    if not any(k for k in existing_templates if k.startswith("copyedit")):
+        logger.info(
+            "Copyedit template doesn't exist. Run the following\n\ncopyedit self init"
+        )
+    else:
+        logger.info("Copyedit template installed")
+
 
 @app.command(name="edit")
 def edit_command(  # noqa: PLR0913
@@ -469,6 +849,14 @@ def edit_command(  # noqa: PLR0913
         "--markdown/--no-markdown",
         help="Enable/disable Markdown formatting and word wrapping of output",
     ),
+    cache: bool = typer.Option(
+        False,
+        "--cache/--no-cache",
+        help=(
+            "Reuse the response to an identical earlier request, and keep "
+            "this one for later runs."
+        ),
+    ),
 ) -> None:
     """Copyedit text using AI.
 
@@ -493,25 +881,197 @@ def edit_command(  # noqa: PLR0913
         json_output,
         wrap_width,
         markdown,
+        cache=cache,
     )
 
 
-def _attach_llm_passthroughs(main_group: DefaultGroup) -> None:
-    """Attach llm's command groups to the 'self' subcommand.
+async def _copyedit_files(
+    file_paths: list[Path],
+    model_name: str | None,
+    concurrency: int,
+    progress: "Progress",
+) -> list[str | BaseException]:
+    """Copyedit several files concurrently with one shared async model.
 
-    This allows users to access llm's native commands within copyedit's
-    isolated configuration context.
+    Returns the raw model output for each file, in input order. A failure
+    for one file is returned in its slot instead of cancelling the others.
+    """
+    import llm  # noqa: PLC0415
 
-    Args:
-        main_group: The main Click group (converted from Typer app)
+    from .copyedit import copyedit_async  # noqa: PLC0415
+
+    model = llm.get_async_model(model_name) if model_name else llm.get_async_model()
+    semaphore = asyncio.Semaphore(concurrency)
+    task_id = progress.add_task("Copyediting files...", total=len(file_paths))
+
+    async def copyedit_one(file_path: Path) -> str:
+        async with semaphore:
+            try:
+                logger.info("Reading from file: {}", file_path)
+                raw = await asyncio.to_thread(file_path.read_bytes)
+                text = raw.decode("utf-8")
+                if not text.strip():
+                    message = "No input text provided"
+                    raise ValueError(message)
+                response = copyedit_async(text, model, stream=False)
+                return await response.text()
+            finally:
+                progress.advance(task_id)
+
+    return await asyncio.gather(
+        *(copyedit_one(file_path) for file_path in file_paths),
+        return_exceptions=True,
+    )
+
+
+@app.command(name="batch")
+def batch_command(  # noqa: PLR0913
+    ctx: typer.Context,
+    file_paths: list[Path] = typer.Argument(
+        ...,
+        help="Files to copyedit.",
+        exists=True,
+        dir_okay=False,
+        readable=True,
+    ),
+    model: str | None = typer.Option(
+        None,
+        "--model",
+        "-m",
+        help="LLM model to use for copyediting.",
+    ),
+    concurrency: int | None = typer.Option(
+        None,
+        "--concurrency",
+        "-j",
+        min=1,
+        help="Maximum number of concurrent LLM requests.",
+    ),
+    wrap_width: int = typer.Option(
+        80,
+        "--wrap-width",
+        "-w",
+        min=1,
+        help="Set width for mdformat word wrapping",
+    ),
+    markdown: bool = typer.Option(
+        True,
+        "--markdown/--no-markdown",
+        help="Enable/disable Markdown formatting and word wrapping of output",
+    ),
+) -> None:
+    """Copyedit several files concurrently.
+
+    Each file is sent to the LLM in parallel (bounded by --concurrency) and
+    the copyedited results are written to stdout in argument order, each
+    preceded by a "==> FILE <==" header. The model requires async support.
+
+    Examples:
+        copyedit_ai batch chapter1.md chapter2.md chapter3.md
+        copyedit_ai batch drafts/*.md -j 8 -m claude-opus
+
+    """
+    from rich.progress import Progress  # noqa: PLC0415
+
+    settings: Settings = ctx.obj
+    model_name = model or settings.default_model
+    max_concurrency = concurrency or settings.max_concurrency
+    # --concurrency has min=1; the setting is only checked here, so a bad
+    # value doesn't break every other command at startup
+    if max_concurrency < 1:
+        message = (
+            f"COPYEDIT_AI_MAX_CONCURRENCY must be at least 1, got {max_concurrency}"
+        )
+        raise typer.BadParameter(message, ctx=ctx)
+
+    console = _get_console()
+    console.print(
+        f"[bold blue]Copyediting:[/bold blue] {len(file_paths)} files "
+        f"[dim](concurrency: {max_concurrency})[/dim]"
+    )
+
+    try:
+        with Progress(console=console, transient=True) as progress:
+            results = asyncio.run(
+                _copyedit_files(file_paths, model_name, max_concurrency, progress)
+            )
+    except Exception as e:
+        logger.exception("Error during batch copyediting")
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1) from e
+
+    failures = 0
+    for file_path, result in zip(file_paths, results, strict=True):
+        if isinstance(result, BaseException):
+            failures += 1
+            logger.error("Failed to copyedit {}: {}", file_path, result)
+            typer.echo(f"Error: {file_path}: {result}", err=True)
+            continue
+
+        output_text = result
+        if markdown:
+            try:
+                output_text = _format_markdown(output_text, wrap_width)
+            except Exception as e:
+                # A formatting failure only loses this file's output
+                failures += 1
+                logger.exception("Failed to format {}", file_path)
+                typer.echo(f"Error: {file_path}: {e}", err=True)
+                continue
+        typer.echo(f"==> {file_path} <==")
+        typer.echo(output_text)
+
+    if failures:
+        raise typer.Exit(1)
+
+
+# llm commands exposed under the 'self' subcommand
+_PASSTHROUGH = (
+    "templates",  # Manage prompt templates
+    "keys",  # Manage API keys
+    "models",  # List and configure models
+    "schemas",  # Manage stored schemas
+    "aliases",  # Manage model aliases
+    "install",  # Install plugins from PyPI
+    "uninstall",  # Uninstall plugins
+    "plugins",  # List and manage installed plugins
+)
+
+
+@functools.cache
+def _resolved_passthroughs() -> dict[str, click.Command]:
+    """Look up llm's passthrough commands once per process.
+
+    Returns:
+        Mapping of command name to llm's Click command, in _PASSTHROUGH order.
 
     """
     try:
         from llm.cli import cli as llm_cli  # noqa: PLC0415
     except ImportError:
         logger.warning("Could not import llm.cli for passthrough commands")
-        return
+        return {}
+
+    commands = {}
+    for cmd_name in _PASSTHROUGH:
+        llm_command = llm_cli.commands.get(cmd_name)
+        if llm_command:
+            commands[cmd_name] = llm_command
+        else:
+            logger.warning("Could not find llm command: {}", cmd_name)
+    return commands
+
+
+def _attach_llm_passthroughs(main_group: "DefaultGroup") -> None:
+    """Attach llm's command groups to the 'self' subcommand.
+
+    This allows users to access llm's native commands within copyedit's
+    isolated configuration context.
+
+    Args:
+        main_group: The main Click group (converted from Typer app)
 
+    """
     # Get the 'self' subcommand (it's also a Click group)
     self_command = main_group.commands.get("self")
     if not self_command:
@@ -521,42 +1081,61 @@ def _attach_llm_passthroughs(main_group: DefaultGroup) -> None:
     # Type assertion: self_command is a Group (has commands and add_command)
     self_command = cast("click.Group", self_command)
 
-    # List of llm commands to pass through
-    passthrough_commands = [
-        "templates",  # Manage prompt templates
-        "keys",  # Manage API keys
-        "models",  # List and configure models
-        "schemas",  # Manage stored schemas
-        "aliases",  # Manage model aliases
-        "install",  # Install plugins from PyPI
-        "uninstall",  # Uninstall plugins
-        "plugins",  # List and manage installed plugins
-    ]
-
     # Attach each command group
-    for cmd_name in passthrough_commands:
+    for cmd_name, llm_command in _resolved_passthroughs().items():
         # Don't override existing commands
         if cmd_name in self_command.commands:
             logger.debug("Skipping llm command {} - already exists", cmd_name)
             continue
 
-        llm_command = llm_cli.commands.get(cmd_name)
-        if llm_command:
-            self_command.add_command(llm_command, name=cmd_name)
-            logger.debug("Attached llm command: {}", cmd_name)
-        else:
-            logger.warning("Could not find llm command: {}", cmd_name)
+        self_command.add_command(llm_command, name=cmd_name)
+        logger.debug("Attached llm command: {}", cmd_name)
+
+
+# Options of the main group that consume the following argument
+_GLOBAL_OPTIONS_WITH_VALUE = frozenset({"--log-file"})
+
+
+def _needs_llm_passthroughs(argv: list[str]) -> bool:
+    """Check whether a command line can reach the llm passthrough commands.
+
+    The passthroughs only live under 'self', and attaching them imports
+    llm.cli, so the common 'copyedit_ai draft.txt' path skips them.
+
+    Args:
+        argv: Command-line arguments, without the program name.
+
+    Returns:
+        True if the 'self' subcommand may be invoked or completed.
+
+    """
+    if "_COPYEDIT_AI_COMPLETE" in os.environ:
+        return True
+
+    # Skip global options (e.g. '--debug', '--log-file PATH') to find the
+    # subcommand name
+    args = iter(argv)
+    for arg in args:
+        if arg in _GLOBAL_OPTIONS_WITH_VALUE:
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg == "self"
+    return False
 
 
+@functools.cache
 def setup_click_group() -> "DefaultGroup":
     """Set up the Click group with DefaultGroup and version option.
 
-    This function is used by both the CLI entry point and tests.
+    This function is used by both the CLI entry point and tests. The group
+    is built once per process; later calls return the same object.
 
     Returns:
         The configured Click group.
 
     """
+    from click_default_group import DefaultGroup  # noqa: PLC0415
+
     click_group = typer.main.get_command(app)
     # Replace the group class with DefaultGroup
     click_group.__class__ = DefaultGroup
@@ -598,17 +1177,9 @@ def cli() -> None:
     """CLI entry point with default command support."""
     default_group = setup_click_group()
 
-    existing_templates = templates_installed()
-
-    if not any(k for k in existing_templates if k.startswith("copyedit")):
-        logger.info(
-            "Copyedit template doesn't exist. Run the following\n\ncopyedit self init"
-        )
-    else:
-        logger.info("Copyedit template installed")
-
     # Attach llm passthrough commands to 'self' subcommand
-    _attach_llm_passthroughs(default_group)
+    if _needs_llm_passthroughs(sys.argv[1:]):
+        _attach_llm_passthroughs(default_group)
 
     default_group()
 
@@ -0,0 +1,240 @@
+"""On-disk cache of copyedit responses.
+
+Copyediting the same draft with the same model and prompt gives the same
+answer often enough that repeating the LLM request is wasted time. Responses
+are stored as plain text files under the application cache directory, keyed
+by a hash of everything that determines the request.
+
+The cache is opt-in (``edit --cache``). Entries expire after
+RESPONSE_CACHE_TTL seconds and at most RESPONSE_CACHE_MAX_ENTRIES are kept;
+the oldest are removed first.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from .user_dir import get_app_cache_dir
+
+if TYPE_CHECKING:
+    import llm
+
+# Cached responses older than this are ignored and removed (seconds)
+RESPONSE_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Upper bound on stored responses; the oldest are pruned beyond it
+RESPONSE_CACHE_MAX_ENTRIES = 256
+
+
+class CachedResponse:
+    """A completed response served from the cache.
+
+    Mirrors the parts of ``llm.Response`` used by the CLI: ``text()``,
+    ``json()`` and iteration over the text.
+    """
+
+    def __init__(self, text: str) -> None:
+        """Wrap previously cached response text."""
+        self._text = text
+
+    def text(self) -> str:
+        """Return the cached response text."""
+        return self._text
+
+    def json(self) -> None:
+        """Return None; raw provider JSON is not cached."""
+        return
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield the cached text as a single chunk."""
+        yield self._text
+
+
+def get_response_cache_dir() -> Path:
+    """Get the directory holding cached responses.
+
+    Returns:
+        Path to the response cache directory
+
+    """
+    return get_app_cache_dir() / "responses"
+
+
+def response_cache_key(
+    model_id: str,
+    system: str | None,
+    schema: dict[str, Any] | None,
+    prompt: str,
+) -> str:
+    """Compute the cache key for a copyedit request.
+
+    Args:
+        model_id: Resolved model identifier
+        system: System prompt sent with the request
+        schema: Optional JSON schema for structured output
+        prompt: Prompt text, including the text to copyedit
+
+    Returns:
+        Hex digest identifying the request
+
+    """
+    digest = hashlib.blake2b()
+    for part in (
+        model_id,
+        system or "",
+        json.dumps(schema, sort_keys=True) if schema is not None else "",
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return get_response_cache_dir() / key[:2] / key
+
+
+def read_cached_response(key: str) -> str | None:
+    """Read a cached response, ignoring (and removing) an expired one.
+
+    Args:
+        key: Cache key from response_cache_key()
+
+    Returns:
+        The cached text, or None if there is no usable entry
+
+    """
+    path = _entry_path(key)
+    try:
+        if time.time() - path.stat().st_mtime > RESPONSE_CACHE_TTL:
+            path.unlink(missing_ok=True)
+            return None
+        return path.read_bytes().decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def write_cached_response(key: str, text: str) -> None:
+    """Store a response in the cache, then prune old entries.
+
+    The entry is written to a temporary file and moved into place
+    atomically. Failures are logged and otherwise ignored: the cache is an
+    optimization, not part of the result.
+
+    Args:
+        key: Cache key from response_cache_key()
+        text: The complete, accepted response text
+
+    """
+    path = _entry_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+    except OSError as error:
+        logger.warning(f"Response cache unavailable: {error}")
+        return
+
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+            temp_file.write(text)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        Path(temp_name).replace(path)
+    except OSError as error:
+        Path(temp_name).unlink(missing_ok=True)
+        logger.warning(f"Could not cache response: {error}")
+        return
+    logger.debug(f"Cached response: {path}")
+    _prune_response_cache()
+
+
+def _prune_response_cache() -> None:
+    """Drop expired entries and the oldest ones beyond the size cap."""
+    cutoff = time.time() - RESPONSE_CACHE_TTL
+    entries: list[tuple[float, str]] = []
+    try:
+        with os.scandir(get_response_cache_dir()) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as it:
+                    entries.extend(
+                        (entry.stat().st_mtime, entry.path)
+                        for entry in it
+                        if not entry.name.startswith(".")
+                    )
+    except OSError as error:
+        logger.debug(f"Could not scan response cache: {error}")
+        return
+
+    entries.sort(reverse=True)
+    for index, (mtime, entry_path) in enumerate(entries):
+        if index >= RESPONSE_CACHE_MAX_ENTRIES or mtime < cutoff:
+            Path(entry_path).unlink(missing_ok=True)
+
+
+class CachingResponse:
+    """A live response that is stored in the cache once accepted.
+
+    Iterating or calling ``text()`` passes the model's output through
+    unchanged while recording it. Nothing is written until the caller has
+    checked the output and calls ``save()``, so an interrupted, truncated or
+    invalid response is never replayed from the cache.
+    """
+
+    def __init__(self, key: str, response: "llm.Response") -> None:
+        """Wrap a response for the request identified by key."""
+        self._key = key
+        self._response = response
+        self._text: str | None = None
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield the response chunks, recording them."""
+        chunks = []
+        for chunk in self._response:
+            chunks.append(chunk)
+            yield chunk
+        # Only a fully consumed stream is recorded
+        self._text = "".join(chunks)
+
+    def text(self) -> str:
+        """Return the complete response text, recording it."""
+        self._text = self._response.text()
+        return self._text
+
+    def json(self) -> Any:  # noqa: ANN401
+        """Return the provider's raw JSON for the response, if any."""
+        return self._response.json()
+
+    def save(self) -> None:
+        """Store the recorded text in the cache.
+
+        Does nothing if the response was never completely read.
+        """
+        if self._text is None:
+            logger.debug("Response not fully read; not caching it")
+            return
+        write_cached_response(self._key, self._text)
+
+
+def clear_response_cache() -> int:
+    """Remove every cached response.
+
+    Returns:
+        Number of cache entries removed
+
+    """
+    cache_dir = get_response_cache_dir()
+    if not cache_dir.is_dir():
+        return 0
+    count = sum(1 for entry in cache_dir.glob("*/*") if not entry.name.startswith("."))
+    shutil.rmtree(cache_dir)
+    return count
@@ -1,13 +1,25 @@
 """Core copyediting functionality using LLM."""
 
-from collections.abc import Iterator
-from typing import Any
+import functools
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-import llm
-from llm.cli import LoadTemplateError, load_template
 from loguru import logger
 
-from .user_dir import get_llm_config_dir, set_llm_user_path
+from .cache import (
+    CachedResponse,
+    CachingResponse,
+    read_cached_response,
+    response_cache_key,
+)
+from .user_dir import get_llm_templates_dir, set_llm_user_path
+
+# llm pulls in pluggy, pydantic and every installed plugin, so it is imported
+# where it is used rather than when this module is loaded.
+if TYPE_CHECKING:
+    import llm
+    from llm.templates import Template
 
 SYSTEM_PROMPT = """You are a copy editor that suggests and makes edits on text.
 
@@ -76,17 +88,78 @@ JSON
 """
 
 
+@functools.lru_cache(maxsize=32)
+def _load_template_cached(name: str, path: str, mtime_ns: int) -> "Template":  # noqa: ARG001
+    """Load and parse a template; path and mtime only key the cache.
+
+    The result is shared: callers that hand it out must copy it.
+    """
+    from llm.cli import LoadTemplateError  # noqa: PLC0415
+    from llm.cli import load_template as llm_load_template  # noqa: PLC0415
+
+    try:
+        return llm_load_template(name)
+    except (TypeError, UnicodeDecodeError) as error:
+        # Undecodable files, and YAML that is neither a string nor a mapping
+        message = f"Invalid template: {name}"
+        raise LoadTemplateError(message) from error
+
+
+def load_template(name: str) -> "Template":
+    """Load an llm template, reusing the parsed result while its file is unchanged.
+
+    llm reads and YAML-parses the template file on every load. Templates are
+    cached by file path and modification time, so an edited template is
+    picked up on the next call. Each call returns its own copy.
+
+    Args:
+        name: Template name, as accepted by llm's load_template()
+
+    Returns:
+        The parsed template
+
+    Raises:
+        LoadTemplateError: If the template cannot be loaded
+
+    """
+    from llm.cli import load_template as llm_load_template  # noqa: PLC0415
+
+    # llm resolves template names against LLM_USER_PATH
+    set_llm_user_path()
+    # Mirror llm's lookup: a local file path wins over the templates directory
+    path = Path(name)
+    if not path.exists():
+        path = get_llm_templates_dir() / f"{name}.yaml"
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        # Missing file, URL or plugin-prefixed template: let llm handle it
+        return llm_load_template(name)
+    # A copy, so a caller changing its template can't alter later loads
+    return _load_template_cached(name, str(path), mtime_ns).model_copy(deep=True)
+
+
 def templates_installed() -> dict[str, str]:
     """List available prompt templates"""
+    from llm.cli import LoadTemplateError  # noqa: PLC0415
+
     set_llm_user_path()
-    path = get_llm_config_dir() / "templates"
+    path = get_llm_templates_dir()
+
+    # One directory read; scandir entries carry the stat results the parse
+    # cache is keyed on, so unchanged templates are not re-read
+    try:
+        with os.scandir(path) as it:
+            entries = [entry for entry in it if entry.name.endswith(".yaml")]
+    except FileNotFoundError:
+        return {}
 
     templates = {}
-    for file in path.glob("*.yaml"):
-        name = file.stem
+    for entry in entries:
+        name = entry.name.removesuffix(".yaml")
         try:
-            template = load_template(name)
-        except LoadTemplateError:
+            template = _load_template_cached(name, entry.path, entry.stat().st_mtime_ns)
+        except (LoadTemplateError, OSError):
             # Skip invalid templates
             continue
         text = []
@@ -100,13 +173,34 @@ def templates_installed() -> dict[str, str]:
     return templates
 
 
+def _prompt_arguments(
+    text: str, *, stream: bool, schema: dict[str, Any] | None
+) -> tuple[str, dict[str, Any]]:
+    """Build the prompt text and keyword arguments shared by sync and async calls."""
+    prompt_text = f"Copy edit the text that follows:\n\n{text}"
+
+    template = load_template("copyedit")
+
+    # Structured output requires a deterministic system prompt. For normal
+    # output, preserve the user's configurable copyedit template.
+    prompt_kwargs: dict[str, Any] = {
+        "system": JSON_SYSTEM_PROMPT if schema is not None else template.system,
+        "stream": stream,
+    }
+    if schema is not None:
+        prompt_kwargs["schema"] = schema
+
+    return prompt_text, prompt_kwargs
+
+
 def copyedit(
     text: str,
     model_name: str | None = None,
     *,
     stream: bool = True,
     schema: dict[str, Any] | None = None,
-) -> llm.Response | Iterator[str]:
+    cache: bool = False,
+) -> "llm.Response | CachedResponse | CachingResponse":
     """Copyedit text using an LLM.
 
     Args:
@@ -114,11 +208,17 @@ def copyedit(
         model_name: Optional model name to use (defaults to llm's default model)
         stream: Whether to stream the response (default: True)
         schema: Optional JSON schema for structured output
+        cache: Serve identical requests from the on-disk response cache
+            (default: False)
 
     Returns:
-        LLM response object if not streaming, iterator of text chunks if streaming
+        LLM response object. With the cache, a CachedResponse on a hit, or
+        a CachingResponse whose save() stores the output once it has been
+        read and accepted
 
     """
+    import llm  # noqa: PLC0415
+
     logger.info(f"Copyediting text with model={model_name}, stream={stream}")
 
     # Get the model
@@ -126,18 +226,52 @@ def copyedit(
 
     logger.debug(f"Using model: {model.model_id}")
 
-    # Prepare the prompt
-    prompt_text = f"Copy edit the text that follows:\n\n{text}"
+    prompt_text, prompt_kwargs = _prompt_arguments(text, stream=stream, schema=schema)
+    if not cache:
+        return model.prompt(prompt_text, **prompt_kwargs)
 
-    template = load_template("copyedit")
+    key = response_cache_key(
+        model.model_id, prompt_kwargs["system"], schema, prompt_text
+    )
+    cached_text = read_cached_response(key)
+    if cached_text is not None:
+        logger.info(f"Using cached response {key[:12]}")
+        return CachedResponse(cached_text)
 
-    # Structured output requires a deterministic system prompt. For normal
-    # output, preserve the user's configurable copyedit template.
-    prompt_kwargs: dict[str, Any] = {
-        "system": JSON_SYSTEM_PROMPT if schema is not None else template.system,
-        "stream": stream,
-    }
-    if schema is not None:
-        prompt_kwargs["schema"] = schema
+    # Stored only when the caller accepts the output (CachingResponse.save)
+    return CachingResponse(key, model.prompt(prompt_text, **prompt_kwargs))
+
+
+def copyedit_async(
+    text: str,
+    model: "llm.AsyncModel | str | None" = None,
+    *,
+    stream: bool = True,
+    schema: dict[str, Any] | None = None,
+) -> "llm.AsyncResponse":
+    """Copyedit text using an async LLM model.
+
+    The returned response is lazy: ``await response.text()`` or
+    ``async for chunk in response`` executes the prompt. This lets callers
+    run several copyedits concurrently on one event loop.
+
+    Args:
+        text: The text to copyedit
+        model: An async model instance, or a model name to look up
+            (defaults to llm's default model)
+        stream: Whether to stream the response (default: True)
+        schema: Optional JSON schema for structured output
+
+    Returns:
+        Async LLM response object
+
+    """
+    import llm  # noqa: PLC0415
+
+    if model is None or isinstance(model, str):
+        model = llm.get_async_model(model) if model else llm.get_async_model()
+
+    logger.info(f"Copyediting text with async model={model.model_id}, stream={stream}")
 
+    prompt_text, prompt_kwargs = _prompt_arguments(text, stream=stream, schema=schema)
     return model.prompt(prompt_text, **prompt_kwargs)
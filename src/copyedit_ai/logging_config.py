@@ -57,7 +57,6 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 from loguru import logger as _logger
-from loguru_config.loguru_config import LoguruConfig  # type: ignore[import-untyped]
 
 DEFAULT_CONFIG_FILENAME = "logging.json"
 LOG_FORMAT = (
@@ -105,7 +104,7 @@ def _default_loguru_config(level: str, log_file: Path | None) -> dict[str, Any]:
                 "format": _format_record,
                 "backtrace": False,
                 "diagnose": False,
-                "enqueue": False,
+                "enqueue": True,
             }
         )
 
@@ -115,10 +114,19 @@ def _default_loguru_config(level: str, log_file: Path | None) -> dict[str, Any]:
     }
 
 
+def _loguru_config() -> Any:  # noqa: ANN401
+    """Return the LoguruConfig class, importing loguru_config on first use."""
+    from loguru_config.loguru_config import (  # type: ignore[import-untyped]  # noqa: PLC0415
+        LoguruConfig,
+    )
+
+    return LoguruConfig
+
+
 def _load_external_config(config_path: Path) -> bool:
     """Load configuration from a file if it exists."""
     if config_path.is_file():
-        LoguruConfig.load(config_path)
+        _loguru_config().load(config_path)
         return True
     return False
 
@@ -178,7 +186,7 @@ def setup_logging(
         enable_file_logging is None and log_file is not None
     )
     file_sink = log_file if should_log_to_file else None
-    LoguruConfig.load(_default_loguru_config(level, file_sink), inplace=True)
+    _loguru_config().load(_default_loguru_config(level, file_sink), inplace=True)
 
 
 def get_logger(name: str | None = None) -> loguru.Logger:
@@ -4,37 +4,69 @@ This module provides a command-line interface to interact with
 internals of the copyedit_ai CLI.
 """
 
+import functools
 import json
 import os
 import shutil
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from importlib.metadata import version
 from pathlib import Path
 
 import typer
-import yaml
-from llm.cli import template_dir
 from loguru import logger
 
-from .copyedit import SYSTEM_PROMPT, templates_installed
 from .user_dir import (
     get_app_config_dir,
     get_llm_config_dir,
+    get_llm_templates_dir,
     initialize,
     is_initialized,
 )
 
 cli = typer.Typer()
 
+# Upper bound on concurrent file copies when importing system llm templates
+IMPORT_MAX_WORKERS = 8
+
+
+@functools.cache
+def _default_template_yaml() -> bytes:
+    """Serialize the default copyedit template once per process.
+
+    Returns:
+        UTF-8 encoded YAML for a template using SYSTEM_PROMPT
+
+    """
+    import yaml  # noqa: PLC0415
+
+    from .copyedit import SYSTEM_PROMPT  # noqa: PLC0415
+
+    # libyaml's emitter is several times faster than the pure-Python one
+    try:
+        from yaml import CSafeDumper as YAMLDumper  # noqa: PLC0415
+    except ImportError:  # PyYAML built without libyaml
+        from yaml import SafeDumper as YAMLDumper  # noqa: PLC0415
+
+    return yaml.dump(
+        {"system": SYSTEM_PROMPT},
+        Dumper=YAMLDumper,
+        indent=4,
+        default_flow_style=False,
+        sort_keys=False,
+        encoding="utf-8",
+    )
+
 
 @cli.command(name="version")
 def version_subcommand() -> None:
     """Retrieve the package version."""
     try:
         pkg_version = version("copyedit_ai")
-        logger.info(f"Package version: {pkg_version}")
+        logger.info("Package version: {}", pkg_version)
         typer.secho(pkg_version, fg=typer.colors.GREEN)
     except Exception as error:
-        logger.error(f"Failed to retrieve package version: {error}")
+        logger.error("Failed to retrieve package version: {}", error)
         raise typer.Exit(code=1) from None
 
 
@@ -64,6 +96,8 @@ def init_command(
         copyedit_ai self init --force
 
     """
+    from .copyedit import templates_installed  # noqa: PLC0415
+
     try:
         app_config_dir = get_app_config_dir()
         llm_config_dir = get_llm_config_dir()
@@ -75,26 +109,19 @@ def init_command(
                 "No copyedit llm templates found. Installing default",
                 fg=typer.colors.YELLOW,
             )
-            default_template = {}
-            default_template["system"] = SYSTEM_PROMPT
-            template_path = template_dir() / "copyedit.yaml"
+            # The directory templates_installed() lists and llm loads from
+            templates_dir = get_llm_templates_dir()
+            templates_dir.mkdir(parents=True, exist_ok=True)
+            template_path = templates_dir / "copyedit.yaml"
             typer.secho(
                 f"Writing default template to: {template_path!s}",
                 fg=typer.colors.YELLOW,
             )
 
-            template_path.write_text(
-                yaml.safe_dump(
-                    default_template,
-                    indent=4,
-                    default_flow_style=False,
-                    sort_keys=False,
-                ),
-                "utf-8",
-            )
+            template_path.write_bytes(_default_template_yaml())
 
         # Check if already initialized
-        if is_initialized() and not force:
+        if not force and is_initialized():
             logger.warning("Configuration already initialized")
             typer.secho(
                 "⚠ Configuration already initialized",
@@ -146,19 +173,36 @@ def _import_system_llm_config(target_dir: Path) -> None:
 
     # Import templates
     system_templates = system_llm_dir / "templates"
-    if system_templates.exists() and system_templates.is_dir():
+    if system_templates.is_dir():
         target_templates = target_dir / "templates"
-        for template_file in system_templates.glob("*.yaml"):
-            target_file = target_templates / template_file.name
-            shutil.copy2(template_file, target_file)
-            imported.append(f"template: {template_file.name}")
-            logger.debug(f"Imported template: {template_file.name}")
+        target_templates.mkdir(parents=True, exist_ok=True)
+        # A single directory read; file contents are copied without
+        # carrying over timestamps or permissions
+        with os.scandir(system_templates) as it:
+            template_entries = [
+                entry
+                for entry in it
+                if entry.name.endswith(".yaml") and entry.is_file()
+            ]
+        target_base = os.fspath(target_templates)
+
+        def copy_template(entry: os.DirEntry[str]) -> str:
+            shutil.copyfile(entry.path, os.path.join(target_base, entry.name))  # noqa: PTH118
+            return entry.name
+
+        # Copies are I/O bound, so a few threads overlap them; the pool size
+        # also caps how many files are open at once
+        with ThreadPoolExecutor(max_workers=IMPORT_MAX_WORKERS) as pool:
+            copied = list(pool.map(copy_template, template_entries))
+        for name in copied:
+            imported.append(f"template: {name}")
+            logger.debug("Imported template: {}", name)
 
     # Import aliases
     system_aliases = system_llm_dir / "aliases.json"
     if system_aliases.exists():
         target_aliases = target_dir / "aliases.json"
-        shutil.copy2(system_aliases, target_aliases)
+        shutil.copyfile(system_aliases, target_aliases)
         imported.append("aliases.json")
         logger.debug("Imported aliases.json")
 
@@ -170,6 +214,22 @@ def _import_system_llm_config(target_dir: Path) -> None:
         typer.echo("  No templates or aliases found in system llm")
 
 
+def _iter_template_stems(directory: Path) -> Iterator[str]:
+    """Yield the names of the YAML templates in a directory.
+
+    Args:
+        directory: Directory to scan
+
+    Yields:
+        Template file names without the .yaml suffix
+
+    """
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(".yaml") and entry.is_file():
+                yield entry.name.removesuffix(".yaml")
+
+
 @cli.command(name="check")
 def check_command(  # noqa: C901, PLR0912, PLR0915
     verbose: bool = typer.Option(
@@ -211,11 +271,11 @@ def check_command(  # noqa: C901, PLR0912, PLR0915
             # List templates
             templates_dir = llm_config_dir / "templates"
             if templates_dir.exists():
-                templates = list(templates_dir.glob("*.yaml"))
+                templates = tuple(_iter_template_stems(templates_dir))
                 typer.echo(f"\nTemplates ({len(templates)}):")
                 if templates:
                     for template in templates:
-                        typer.echo(f"  - {template.stem}")
+                        typer.echo(f"  - {template}")
                 else:
                     typer.echo("  (none)")
 
@@ -223,16 +283,15 @@ def check_command(  # noqa: C901, PLR0912, PLR0915
             aliases_file = llm_config_dir / "aliases.json"
             if aliases_file.exists():
                 try:
-                    with aliases_file.open() as f:
-                        aliases = json.load(f)
+                    aliases = json.loads(aliases_file.read_bytes())
                     typer.echo(f"\nAliases ({len(aliases)}):")
                     if aliases:
                         for alias, model in aliases.items():
                             typer.echo(f"  - {alias} -> {model}")
                     else:
                         typer.echo("  (none)")
-                except (json.JSONDecodeError, OSError) as e:
-                    logger.debug(f"Error reading aliases: {e}")
+                except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+                    logger.debug("Error reading aliases: {}", e)
                     typer.echo("\nAliases: (error reading file)")
             else:
                 typer.echo("\nAliases (0):")
@@ -241,8 +300,9 @@ def check_command(  # noqa: C901, PLR0912, PLR0915
             if verbose:
                 # Show additional details
                 typer.echo("\nDirectory contents:")
-                for item in llm_config_dir.iterdir():
-                    typer.echo(f"  - {item.name}")
+                with os.scandir(llm_config_dir) as it:
+                    for item in it:
+                        typer.echo(f"  - {item.name}")
 
         else:
             typer.secho("⚠ Configuration not initialized", fg=typer.colors.YELLOW)
@@ -256,3 +316,28 @@ def check_command(  # noqa: C901, PLR0912, PLR0915
         logger.exception("Failed to check configuration")
         typer.echo(f"Error: {error}", err=True)
         raise typer.Exit(1) from None
+
+
+cache_cli = typer.Typer(help="Manage the cache of copyedit responses.")
+cli.add_typer(cache_cli, name="cache")
+
+
+@cache_cli.command(name="clear")
+def cache_clear_command() -> None:
+    """Remove all cached copyedit responses.
+
+    Examples:
+        copyedit_ai self cache clear
+
+    """
+    from .cache import clear_response_cache  # noqa: PLC0415
+
+    try:
+        removed = clear_response_cache()
+    except OSError as error:
+        logger.exception("Failed to clear response cache")
+        typer.echo(f"Error: {error}", err=True)
+        raise typer.Exit(1) from None
+
+    logger.info("Removed {} cached response(s)", removed)
+    typer.secho(f"✓ Removed {removed} cached response(s)", fg=typer.colors.GREEN)
@@ -1,5 +1,6 @@
 """copyedit_ai Settings."""
 
+import functools
 from pathlib import Path
 
 from pydantic import model_validator
@@ -18,6 +19,8 @@ class Settings(BaseSettings):
     use_isolated_llm_config: bool = True  # Use isolated LLM configuration
     llm_config_path: Path | None = None  # Override path for LLM config
     log_file: Path | None = None  # Path to log file (disabled by default)
+    # Concurrent LLM requests for batch edits; checked by the batch command
+    max_concurrency: int = 4
 
     @model_validator(mode="after")
     def setup_llm_config(self) -> "Settings":
@@ -28,3 +31,14 @@ class Settings(BaseSettings):
 
             set_llm_user_path()
         return self
+
+
+@functools.cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, loading them on first use.
+
+    Returns:
+        Settings read from the environment and .env-copyedit_ai
+
+    """
+    return Settings()
@@ -5,7 +5,9 @@ configuration, including isolated LLM configuration to prevent conflicts
 with system-wide llm installations.
 """
 
+import functools
 import os
+import stat
 from pathlib import Path
 
 import platformdirs
@@ -14,6 +16,13 @@ from loguru import logger
 # Application identifier using reverse domain notation
 APP_IDENTIFIER = "dev.pirateninja.copyedit_ai"
 
+# llm config directories already seen to exist; a configuration directory
+# is not expected to disappear while the CLI is running
+_initialized_dirs: set[Path] = set()
+
+# Value this module last assigned to LLM_USER_PATH
+_llm_user_path_set: str | None = None
+
 
 def get_xdg_config_home() -> Path:
     """Get XDG_CONFIG_HOME or fallback to ~/.config.
@@ -28,6 +37,59 @@ def get_xdg_config_home() -> Path:
     return Path.home() / ".config"
 
 
+@functools.lru_cache(maxsize=8)
+def _config_dirs(
+    xdg_config_home: str | None,
+    xdg_data_home: str | None,  # noqa: ARG001
+    home: str | None,  # noqa: ARG001
+) -> tuple[Path, Path]:
+    """Resolve the app and llm config directories for an environment.
+
+    The arguments are the environment variables the result depends on, so
+    the cache follows changes to them. platformdirs reads XDG_DATA_HOME and
+    HOME itself; they are only passed here to key the cache.
+
+    Returns:
+        Application config directory and its llm_config subdirectory
+
+    """
+    if xdg_config_home:
+        app_config_dir = Path(xdg_config_home) / APP_IDENTIFIER
+    else:
+        app_config_dir = Path(platformdirs.user_data_dir(APP_IDENTIFIER, "copyedit_ai"))
+    return app_config_dir, app_config_dir / "llm_config"
+
+
+def _current_config_dirs() -> tuple[Path, Path]:
+    return _config_dirs(
+        os.environ.get("XDG_CONFIG_HOME"),
+        os.environ.get("XDG_DATA_HOME"),
+        os.environ.get("HOME"),
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _cache_dir(xdg_cache_home: str | None, home: str | None) -> Path:  # noqa: ARG001
+    """Resolve the app cache directory for an environment.
+
+    Keyed like _config_dirs: HOME is only passed so the cache follows it.
+
+    Returns:
+        Application cache directory
+
+    """
+    if xdg_cache_home:
+        return Path(xdg_cache_home) / APP_IDENTIFIER
+    return Path(platformdirs.user_cache_dir(APP_IDENTIFIER, "copyedit_ai"))
+
+
+def _clear_path_cache() -> None:
+    """Forget resolved config directories and their initialized state."""
+    _config_dirs.cache_clear()
+    _cache_dir.cache_clear()
+    _initialized_dirs.clear()
+
+
 def get_app_config_dir() -> Path:
     """Get dev.pirateninja.copyedit_ai config directory.
 
@@ -35,10 +97,18 @@ def get_app_config_dir() -> Path:
         Path to application config directory
 
     """
-    if os.environ.get("XDG_CONFIG_HOME"):
-        return get_xdg_config_home() / APP_IDENTIFIER
+    return _current_config_dirs()[0]
 
-    return Path(platformdirs.user_data_dir(APP_IDENTIFIER, "copyedit_ai"))
+
+def get_app_cache_dir() -> Path:
+    """Get dev.pirateninja.copyedit_ai cache directory.
+
+    Returns:
+        Path to application cache directory
+
+    """
+    # Looked up for every response cache read and write
+    return _cache_dir(os.environ.get("XDG_CACHE_HOME"), os.environ.get("HOME"))
 
 
 def get_llm_config_dir() -> Path:
@@ -48,7 +118,20 @@ def get_llm_config_dir() -> Path:
         Path to LLM configuration directory
 
     """
-    return get_app_config_dir() / "llm_config"
+    return _current_config_dirs()[1]
+
+
+def get_llm_templates_dir() -> Path:
+    """Get the templates directory llm reads.
+
+    Follows LLM_USER_PATH, as llm does, so a user override set before
+    set_llm_user_path() runs is respected.
+
+    Returns:
+        Path to the llm templates directory
+
+    """
+    return Path(os.environ.get("LLM_USER_PATH") or get_llm_config_dir()) / "templates"
 
 
 def is_initialized() -> bool:
@@ -59,7 +142,19 @@ def is_initialized() -> bool:
 
     """
     llm_config_dir = get_llm_config_dir()
-    return llm_config_dir.exists() and llm_config_dir.is_dir()
+    if llm_config_dir in _initialized_dirs:
+        return True
+
+    # One stat call answers both "exists" and "is a directory"
+    try:
+        st = llm_config_dir.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+    if not stat.S_ISDIR(st.st_mode):
+        return False
+
+    _initialized_dirs.add(llm_config_dir)
+    return True
 
 
 def initialize(*, force: bool = False) -> None:
@@ -75,24 +170,25 @@ def initialize(*, force: bool = False) -> None:
     app_config_dir = get_app_config_dir()
     llm_config_dir = get_llm_config_dir()
 
-    if is_initialized() and not force:
-        logger.debug(f"Directory already initialized at {app_config_dir}")
+    if not force and is_initialized():
+        logger.debug("Directory already initialized at {}", app_config_dir)
         return
 
     try:
-        # Create directories with appropriate permissions (0700 - user only)
-        app_config_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
-        llm_config_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
-
-        # Create templates subdirectory
+        # Create the whole tree with one call; parents=True creates
+        # intermediate directories with the default mode, so the two
+        # directories above templates are restricted afterwards (0700 - user
+        # only, llm_config holds API keys)
         templates_dir = llm_config_dir / "templates"
-        templates_dir.mkdir(exist_ok=True, mode=0o700)
+        templates_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+        app_config_dir.chmod(0o700)
+        llm_config_dir.chmod(0o700)
 
-        logger.info(f"Initialized configuration at {app_config_dir}")
-        logger.debug(f"LLM config directory: {llm_config_dir}")
+        logger.info("Initialized configuration at {}", app_config_dir)
+        logger.debug("LLM config directory: {}", llm_config_dir)
 
     except OSError as e:
-        logger.error(f"Failed to initialize directories: {e}")
+        logger.error("Failed to initialize directories: {}", e)
         raise
 
 
@@ -111,11 +207,19 @@ def set_llm_user_path() -> None:
         configuration, templates, or aliases.
 
     """
+    global _llm_user_path_set  # noqa: PLW0603
+
+    current = os.environ.get("LLM_USER_PATH")
+    # Already pointing at the directory set by an earlier call
+    if current and current == _llm_user_path_set:
+        return
+
     # Respect explicit user overrides
-    if os.environ.get("LLM_USER_PATH"):
+    if current:
         logger.debug("LLM_USER_PATH already set, using user override")
         return
 
-    llm_config = get_llm_config_dir()
-    os.environ["LLM_USER_PATH"] = str(llm_config)
-    logger.debug(f"Set LLM_USER_PATH={llm_config}")
+    llm_config = str(get_llm_config_dir())
+    os.environ["LLM_USER_PATH"] = llm_config
+    _llm_user_path_set = llm_config
+    logger.debug("Set LLM_USER_PATH={}", llm_config)
@@ -1,6 +1,7 @@
 """Copyedit with AI pytest configuration file."""
 
 import tomllib
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
@@ -28,3 +29,38 @@ def pyproject_toml(pyproject_path: Path) -> dict:
 def project_version(pyproject_toml: dict) -> str:
     """Return the project version from pyproject.toml."""
     return pyproject_toml["project"]["version"]
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep copyedit_ai's cache files out of the real user cache directory."""
+    cache_home = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home
+
+
+@pytest.fixture
+def xdg_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point XDG_CONFIG_HOME at a temporary directory and return it."""
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def clear_template_cache() -> Iterator[None]:
+    """Don't let parsed templates leak between tests."""
+    from copyedit_ai.copyedit import _load_template_cached  # noqa: PLC0415
+
+    _load_template_cached.cache_clear()
+    yield
+    _load_template_cached.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_settings_cache() -> Iterator[None]:
+    """Load settings afresh for each test."""
+    from copyedit_ai.settings import get_settings  # noqa: PLC0415
+
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
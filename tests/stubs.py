@@ -0,0 +1,13 @@
+"""Stub objects shared by the copyedit_ai tests."""
+
+
+class ResponseStub(list):
+    """An LLM response that iterates over its chunks and joins them for text()."""
+
+    def text(self) -> str:
+        """Return the chunks joined together."""
+        return "".join(self)
+
+    def json(self) -> None:
+        """Return no structured output."""
+        return
@@ -0,0 +1,122 @@
+"""Test copyedit_ai response cache."""
+
+import os
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from copyedit_ai import cache
+from copyedit_ai.cache import (
+    CachedResponse,
+    CachingResponse,
+    clear_response_cache,
+    get_response_cache_dir,
+    read_cached_response,
+    response_cache_key,
+    write_cached_response,
+)
+from tests.stubs import ResponseStub
+
+
+def test_response_cache_key_depends_on_every_input():
+    """Test that changing any part of the request changes the key."""
+    base = response_cache_key("model-a", "system", None, "text")
+    assert base == response_cache_key("model-a", "system", None, "text")
+    assert base != response_cache_key("model-b", "system", None, "text")
+    assert base != response_cache_key("model-a", "other", None, "text")
+    assert base != response_cache_key("model-a", "system", {"type": "object"}, "text")
+    assert base != response_cache_key("model-a", "system", None, "other text")
+
+
+def test_write_cached_response_round_trip():
+    """Test that a written response can be read back."""
+    key = response_cache_key("model", "system", None, "text")
+    assert read_cached_response(key) is None
+
+    write_cached_response(key, "Corrected text")
+
+    assert read_cached_response(key) == "Corrected text"
+
+
+def test_caching_response_saves_only_complete_output():
+    """Test that only a fully read response is stored, and only on save()."""
+    key = response_cache_key("model", "system", None, "text")
+    response = CachingResponse(key, ResponseStub(["Corrected", " text"]))
+
+    chunks = iter(response)
+    assert next(chunks) == "Corrected"
+    response.save()
+    assert read_cached_response(key) is None
+
+    assert list(chunks) == [" text"]
+    assert read_cached_response(key) is None
+    response.save()
+    assert read_cached_response(key) == "Corrected text"
+
+
+def test_caching_response_interrupted_stream_is_not_saved():
+    """Test that an interrupted response leaves no entry behind."""
+    key = response_cache_key("model", "system", None, "text")
+
+    def failing_chunks() -> Iterator[str]:
+        yield "Partial"
+        msg = "stream interrupted"
+        raise RuntimeError(msg)
+
+    response = CachingResponse(key, failing_chunks())
+    with pytest.raises(RuntimeError, match="stream interrupted"):
+        list(response)
+    response.save()
+
+    assert read_cached_response(key) is None
+    assert not get_response_cache_dir().exists()
+
+
+def test_expired_response_is_ignored():
+    """Test that entries older than the TTL are not served."""
+    key = response_cache_key("model", "system", None, "text")
+    write_cached_response(key, "Old text")
+    path = get_response_cache_dir() / key[:2] / key
+    expired = time.time() - cache.RESPONSE_CACHE_TTL - 1
+    os.utime(path, (expired, expired))
+
+    assert read_cached_response(key) is None
+    assert not path.exists()
+
+
+def test_response_cache_is_capped(monkeypatch: pytest.MonkeyPatch):
+    """Test that the oldest entries are pruned beyond the size cap."""
+    monkeypatch.setattr(cache, "RESPONSE_CACHE_MAX_ENTRIES", 2)
+    keys = [response_cache_key("model", "system", None, str(i)) for i in range(3)]
+    now = time.time()
+    for age, key in zip((30, 20, 10), keys, strict=True):
+        write_cached_response(key, key)
+        path = get_response_cache_dir() / key[:2] / key
+        os.utime(path, (now - age, now - age))
+    # Prune again now that the entries have distinct ages
+    write_cached_response(keys[2], keys[2])
+
+    assert read_cached_response(keys[0]) is None
+    assert read_cached_response(keys[1]) == keys[1]
+    assert read_cached_response(keys[2]) == keys[2]
+
+
+def test_cached_response_behaves_like_response():
+    """Test the response interface used by the CLI."""
+    response = CachedResponse("Corrected text")
+    assert response.text() == "Corrected text"
+    assert response.json() is None
+    assert list(response) == ["Corrected text"]
+
+
+def test_clear_response_cache():
+    """Test that clearing removes all entries and reports the count."""
+    assert clear_response_cache() == 0
+    texts = ("one", "two")
+    for text in texts:
+        key = response_cache_key("model", "system", None, text)
+        write_cached_response(key, text)
+
+    assert clear_response_cache() == len(texts)
+    assert not get_response_cache_dir().exists()
@@ -1,25 +1,52 @@
 """test copyedit_ai CLI: copyedit_ai."""
 
-import importlib
+import io
 import json
+import os
+import time
 import tomllib
 from pathlib import Path
-from typing import TYPE_CHECKING
-from unittest.mock import MagicMock, create_autospec, patch
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+from unittest.mock import DEFAULT, MagicMock, patch
 
 import llm
+import pytest
+import typer.main
+import yaml
 from click.testing import CliRunner as ClickRunner
 from loguru import logger as loguru_logger
 from typer.testing import CliRunner
 
+from copyedit_ai import __main__ as main_module
+from copyedit_ai.__main__ import (
+    _attach_llm_passthroughs,
+    _BufferedStreamWriter,
+    _needs_llm_passthroughs,
+    main_callback,
+)
+
+# Test against the Typer app, not the wrapped cli function
+from copyedit_ai.__main__ import app as cli
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader
+
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import click
     from click_default_group import DefaultGroup
 
-main_module_name = "copyedit_ai.__main__"
-main_module = importlib.import_module(main_module_name)
 runner = CliRunner()
-# Use the Typer app for testing, not the wrapped cli function
-cli = main_module.app
+
+# Expected output shared by several tests
+MSG_INITIALIZED = "Initialized copyedit_ai configuration"
+MSG_NOT_INITIALIZED = "Configuration not initialized"
+MSG_RUN_INIT = "copyedit_ai self init"
+MSG_COPYEDITING = "Copyediting:"
 
 
 def _get_click_cli() -> "DefaultGroup":
@@ -30,22 +57,68 @@ def _get_click_cli() -> "DefaultGroup":
     return main_module.setup_click_group()
 
 
-def test_cli_help() -> None:
-    """Test the main command-line interface help flag."""
-    result = runner.invoke(cli, ["--help"])
-    assert result.exit_code == 0
+@pytest.mark.parametrize(
+    ("argv", "succeeds"),
+    [
+        (["--help"], True),
+        (["self", "--help"], True),
+        (["self"], False),
+    ],
+)
+def test_cli_help(argv: list[str], succeeds: bool) -> None:
+    """Test help output for the CLI and the self subcommand.
+
+    Invoking 'self' with no subcommand prints usage and fails.
+    """
+    result = runner.invoke(cli, argv)
+    assert (result.exit_code == 0) is succeeds
+    assert "Usage:" in result.output
+
+
+@pytest.fixture
+def fresh_model_index():
+    """Clear the in-process model display-name index around a test."""
+    main_module._model_display_index.cache_clear()  # noqa: SLF001
+    yield
+    main_module._model_display_index.cache_clear()  # noqa: SLF001
+
+
+def _model_with_aliases(model_id: str, aliases: set[str]) -> MagicMock:
+    """Build a mock llm ModelWithAliases entry."""
+    model_with_alias = MagicMock()
+    model_with_alias.aliases = aliases
+    model_with_alias.model.model_id = model_id
+    return model_with_alias
 
 
-@patch("copyedit_ai.__main__.llm.get_models_with_aliases")
+@pytest.mark.usefixtures("fresh_model_index")
+@patch("llm.get_models_with_aliases")
 def test_model_display_name_uses_shortest_alias(mock_get_models) -> None:
     """Choose the shortest alias when llm returns aliases as a set."""
-    model_with_alias = MagicMock()
-    model_with_alias.matches.return_value = True
-    model_with_alias.aliases = {"long-model-name", "short"}
-    model_with_alias.model.model_id = "model-id"
-    mock_get_models.return_value = [model_with_alias]
+    mock_get_models.return_value = [
+        _model_with_aliases("model-id", {"long-model-name", "short"})
+    ]
 
     assert main_module._get_model_display_name("model-id") == "short"  # noqa: SLF001
+    assert main_module._get_model_display_name("LONG-model-name") == "short"  # noqa: SLF001
+    assert main_module._get_model_display_name("unknown") == "unknown"  # noqa: SLF001
+
+
+@pytest.mark.usefixtures("fresh_model_index")
+@patch("llm.get_models_with_aliases")
+def test_model_display_index_is_cached_on_disk(
+    mock_get_models, isolated_cache_dir: Path
+) -> None:
+    """The model index is enumerated once and reused from the cache directory."""
+    mock_get_models.return_value = [_model_with_aliases("model-id", {"m"})]
+
+    assert main_module._get_model_display_name("model-id") == "m"  # noqa: SLF001
+    assert (isolated_cache_dir / "dev.pirateninja.copyedit_ai" / "models.json").exists()
+
+    # A new process (simulated by clearing the in-memory cache) reads the file
+    main_module._model_display_index.cache_clear()  # noqa: SLF001
+    assert main_module._get_model_display_name("model-id") == "m"  # noqa: SLF001
+    mock_get_models.assert_called_once()
 
 
 def test_cli_entry_points_exist() -> None:
@@ -68,19 +141,6 @@ def test_cli_entry_points_exist() -> None:
     )
 
 
-def test_cli_self_no_arguments() -> None:
-    """Test the self subcommand with no arguments."""
-    result = runner.invoke(cli, ["self"])
-    assert result.exit_code != 0
-    assert "Usage:" in result.output
-
-
-def test_cli_self_help() -> None:
-    """Test the self subcommand help flag."""
-    result = runner.invoke(cli, ["self", "--help"])
-    assert result.exit_code == 0
-
-
 def test_cli_self_version(project_version: str) -> None:
     """Test the version self subcommand."""
     result = runner.invoke(cli, ["self", "version"])
@@ -95,6 +155,15 @@ def test_cli_version_command(project_version: str) -> None:
     assert result.output.strip() == f"copyedit-ai: {project_version}"
 
 
+def test_setup_click_group_is_built_once() -> None:
+    """Test that the Click group is reused within a process."""
+    click_cli = _get_click_cli()
+
+    assert _get_click_cli() is click_cli
+    version_options = [param for param in click_cli.params if "--version" in param.opts]
+    assert len(version_options) == 1
+
+
 def test_cli_version_option_long(project_version: str) -> None:
     """Test the --version option."""
     click_cli = _get_click_cli()
@@ -113,16 +182,42 @@ def test_cli_version_option_short(project_version: str) -> None:
     assert result.output.strip() == f"copyedit-ai: {project_version}"
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_with_file(mock_copyedit, tmp_path: Path) -> None:
+@pytest.fixture(scope="session")
+def sample_text_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Write a short plain-text input file once and return its path.
+
+    The file is shared by every test in the session, so tests that rewrite
+    their input (--replace) create their own file under tmp_path instead.
+    """
+    path = tmp_path_factory.mktemp("cli") / "test.txt"
+    path.write_bytes(b"Test text.")
+    return path
+
+
+class _StreamStub:
+    """A streaming response that only supports iteration over its chunks."""
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self, chunks: list[str]) -> None:
+        self._chunks = chunks
+
+    def __iter__(self) -> "Iterator[str]":
+        return iter(self._chunks)
+
+
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_with_file(
+    mock_copyedit,
+    tmp_path: Path,
+) -> None:
     """Test the CLI with a file argument."""
     # Create a temporary test file
     test_file = tmp_path / "test.txt"
     test_file.write_text("Test text with erors.")
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     result = runner.invoke(cli, ["edit", str(test_file)])
@@ -134,12 +229,11 @@ def test_cli_with_file(mock_copyedit, tmp_path: Path) -> None:
     assert "Test text with erors." in call_args[0][0]
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_with_stdin(mock_copyedit) -> None:
     """Test the CLI with stdin input."""
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     test_input = "Test text from stdin."
@@ -152,19 +246,17 @@ def test_cli_with_stdin(mock_copyedit) -> None:
     assert test_input in call_args[0][0]
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_with_model_option(mock_copyedit, tmp_path: Path) -> None:
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_with_model_option(
+    mock_copyedit,
+    sample_text_file: Path,
+) -> None:
     """Test the CLI with --model option."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
-    result = runner.invoke(cli, ["edit", "--model", "gpt-4o", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--model", "gpt-4o", str(sample_text_file)])
 
     assert result.exit_code == 0
     mock_copyedit.assert_called_once()
@@ -173,20 +265,33 @@ def test_cli_with_model_option(mock_copyedit, tmp_path: Path) -> None:
     assert call_kwargs["model_name"] == "gpt-4o"
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_with_no_stream(mock_copyedit, tmp_path: Path) -> None:
-    """Test the CLI with --no-stream option."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
+class _LLMResponseStub(llm.Response):
+    """A completed llm.Response with canned text and JSON output.
+
+    Subclassing keeps the CLI's isinstance checks working without the cost
+    of autospeccing llm.Response.
+    """
 
+    def __init__(self, text: str = "", json_data: dict[str, Any] | None = None) -> None:
+        # llm.Response.__init__ needs a real prompt and model; skip it
+        self._stub_text = text
+        self._stub_json = json_data
+
+    def text(self) -> str:
+        return self._stub_text
+
+    def json(self) -> dict[str, Any] | None:
+        return self._stub_json
+
+
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_with_no_stream(mock_copyedit, sample_text_file: Path) -> None:
+    """Test the CLI with --no-stream option."""
     # Mock the copyedit response for non-streaming
-    # Use create_autospec to make isinstance checks work
-    mock_response = create_autospec(llm.Response, instance=True)
-    mock_response.text.return_value = "Corrected text"
+    mock_response = _LLMResponseStub("Corrected text")
     mock_copyedit.return_value = mock_response
 
-    result = runner.invoke(cli, ["edit", "--no-stream", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--no-stream", str(sample_text_file)])
 
     assert result.exit_code == 0
     mock_copyedit.assert_called_once()
@@ -195,30 +300,95 @@ def test_cli_with_no_stream(mock_copyedit, tmp_path: Path) -> None:
     assert call_kwargs["stream"] is False
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_with_json_output(mock_copyedit, tmp_path: Path) -> None:
     """The --json option requests and prints structured output."""
     test_file = tmp_path / "test.txt"
     test_file.write_text("Test text with erors.")
 
-    mock_response = create_autospec(llm.Response, instance=True)
-    mock_response.json.return_value = {
+    structured = {
         "copyedited_text": "Test text with errors.",
         "changes": ["Fixed spelling of 'erors'."],
     }
-    mock_copyedit.return_value = mock_response
+    mock_copyedit.return_value = _LLMResponseStub(json_data=structured)
 
     result = runner.invoke(cli, ["edit", "--json", str(test_file)])
 
     assert result.exit_code == 0
-    assert json.loads(result.stdout) == mock_response.json.return_value
+    assert json.loads(result.stdout) == structured
     call_kwargs = mock_copyedit.call_args[1]
     assert call_kwargs["stream"] is False
     assert call_kwargs["schema"]["type"] == "object"
     assert "copyedited_text" in call_kwargs["schema"]["required"]
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("rich.status.Status")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_no_spinner_when_not_a_terminal(
+    mock_copyedit,
+    mock_status,
+    sample_text_file: Path,
+) -> None:
+    """Test that the spinner is not started when stderr is not a terminal."""
+    mock_response = _StreamStub(["Corrected text"])
+    mock_copyedit.return_value = mock_response
+
+    result = runner.invoke(cli, ["edit", str(sample_text_file)])
+
+    assert result.exit_code == 0
+    mock_status.assert_not_called()
+
+
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_cache_is_opt_in(
+    mock_copyedit,
+    sample_text_file: Path,
+) -> None:
+    """Test that the response cache is only used with --cache."""
+    mock_response = _StreamStub(["Corrected text"])
+    mock_copyedit.return_value = mock_response
+
+    result = runner.invoke(cli, ["edit", str(sample_text_file)])
+    assert result.exit_code == 0
+    assert mock_copyedit.call_args[1]["cache"] is False
+
+    mock_copyedit.return_value = _StreamStub(["Corrected text"])
+    result = runner.invoke(cli, ["edit", "--cache", str(sample_text_file)])
+    assert result.exit_code == 0
+    assert mock_copyedit.call_args[1]["cache"] is True
+
+
+@patch("copyedit_ai.copyedit.load_template")
+@patch("llm.get_model")
+def test_cli_cache_skips_invalid_structured_output(
+    mock_get_model, mock_load_template, sample_text_file: Path
+) -> None:
+    """Test that a response failing --json validation is not cached."""
+    mock_load_template.return_value = SimpleNamespace(system="system")
+    mock_model = mock_get_model.return_value
+    mock_model.model_id = "test-model"
+    mock_model.prompt.return_value = _LLMResponseStub("not json")
+
+    result = runner.invoke(cli, ["edit", "--cache", "--json", str(sample_text_file)])
+    assert result.exit_code == 1
+
+    # Nothing was stored, so the next run asks the model again
+    mock_model.prompt.return_value = _LLMResponseStub(
+        json.dumps({"copyedited_text": "Fixed.", "changes": []})
+    )
+    result = runner.invoke(cli, ["edit", "--cache", "--json", str(sample_text_file)])
+    assert result.exit_code == 0, result.output
+    assert mock_model.prompt.call_count == 2  # noqa: PLR2004
+
+    # The valid response was stored and is served without the model
+    result = runner.invoke(cli, ["edit", "--cache", "--json", str(sample_text_file)])
+    assert result.exit_code == 0, result.output
+    assert '"copyedited_text": "Fixed."' in result.stdout
+    assert "Using a cached response" in result.output
+    assert mock_model.prompt.call_count == 2  # noqa: PLR2004
+
+
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_empty_input(mock_copyedit) -> None:
     """Test the CLI with empty input."""
     result = runner.invoke(cli, ["edit"], input="")
@@ -238,47 +408,188 @@ def test_cli_file_not_found() -> None:
     # Typer will show an error about the file not existing
 
 
-@patch("copyedit_ai.self_subcommand.initialize")
-@patch("copyedit_ai.self_subcommand.is_initialized")
-@patch("copyedit_ai.self_subcommand.get_app_config_dir")
-@patch("copyedit_ai.self_subcommand.get_llm_config_dir")
-def test_cli_self_init(
-    mock_get_llm_config,
-    mock_get_app_config,
-    mock_is_initialized,
-    mock_initialize,
+class _AsyncResponseStub:
+    """An async llm response whose text() coroutine returns fixed text."""
+
+    __slots__ = ("_text",)
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+
+    async def text(self) -> str:
+        return self._text
+
+
+@patch("llm.get_async_model")
+@patch("copyedit_ai.copyedit.copyedit_async")
+def test_cli_batch_outputs_files_in_order(
+    mock_copyedit_async, mock_get_async_model, tmp_path: Path
+) -> None:
+    """The batch command edits every file and prints results in input order."""
+    first = tmp_path / "first.txt"
+    first.write_text("First text.")
+    second = tmp_path / "second.txt"
+    second.write_text("Second text.")
+
+    mock_copyedit_async.side_effect = lambda text, *_args, **_kwargs: (
+        _AsyncResponseStub(f"Edited {text}")
+    )
+
+    result = runner.invoke(
+        cli, ["batch", "--no-markdown", "-m", "gpt-4o", str(first), str(second)]
+    )
+
+    assert result.exit_code == 0, result.output
+    # One async model lookup is shared by every file
+    mock_get_async_model.assert_called_once_with("gpt-4o")
+    assert mock_copyedit_async.call_count == 2  # noqa: PLR2004
+    first_header = result.stdout.index(f"==> {first} <==")
+    second_header = result.stdout.index(f"==> {second} <==")
+    assert first_header < second_header
+    assert "Edited First text." in result.stdout
+    assert "Edited Second text." in result.stdout
+
+
+@patch("llm.get_async_model")
+@patch("copyedit_ai.copyedit.copyedit_async")
+def test_cli_batch_reports_failed_files(
+    mock_copyedit_async,
+    _mock_get_async_model,  # noqa: PT019
     tmp_path: Path,
 ) -> None:
-    """Test the self init subcommand."""
-    # Setup mocks
-    mock_is_initialized.return_value = False
+    """A failing file is reported without discarding the other results."""
+    good = tmp_path / "good.txt"
+    good.write_text("Good text.")
+    empty = tmp_path / "empty.txt"
+    empty.write_text("")
+
+    mock_copyedit_async.return_value = _AsyncResponseStub("Edited good text.")
+
+    result = runner.invoke(cli, ["batch", "--no-markdown", str(good), str(empty)])
+
+    assert result.exit_code == 1
+    assert "Edited good text." in result.stdout
+    assert f"Error: {empty}: No input text provided" in result.output
+    mock_copyedit_async.assert_called_once()
+
+
+@patch("copyedit_ai.__main__._format_markdown")
+@patch("llm.get_async_model")
+@patch("copyedit_ai.copyedit.copyedit_async")
+def test_cli_batch_reports_format_failures(
+    mock_copyedit_async,
+    _mock_get_async_model,  # noqa: PT019
+    mock_format_markdown,
+    tmp_path: Path,
+) -> None:
+    """A file whose output fails to format doesn't abort the batch."""
+    first = tmp_path / "first.txt"
+    first.write_text("First text.")
+    second = tmp_path / "second.txt"
+    second.write_text("Second text.")
+
+    mock_copyedit_async.side_effect = lambda text, *_args, **_kwargs: (
+        _AsyncResponseStub(f"Edited {text}")
+    )
+    mock_format_markdown.side_effect = [ValueError("bad markdown"), "Formatted"]
+
+    result = runner.invoke(cli, ["batch", str(first), str(second)])
+
+    assert result.exit_code == 1
+    assert f"Error: {first}: bad markdown" in result.output
+    assert f"==> {first} <==" not in result.stdout
+    assert f"==> {second} <==" in result.stdout
+    assert "Formatted" in result.stdout
+
+
+def test_default_template_yaml_round_trips() -> None:
+    """Test that the serialized default template loads back to SYSTEM_PROMPT."""
+    from copyedit_ai.copyedit import SYSTEM_PROMPT  # noqa: PLC0415
+    from copyedit_ai.self_subcommand import _default_template_yaml  # noqa: PLC0415
+
+    data = _default_template_yaml()
+
+    assert isinstance(data, bytes)
+    assert yaml.load(data, Loader=_SafeLoader) == {"system": SYSTEM_PROMPT}
+    assert _default_template_yaml() is data
+
+
+@pytest.fixture
+def self_mocks(tmp_path: Path) -> "Iterator[SimpleNamespace]":
+    """Patch the config directory helpers used by the self subcommands.
+
+    The app and llm config directories point into tmp_path; initialize is a
+    mock and is_initialized returns False unless a test says otherwise.
+    """
     app_config_dir = tmp_path / "app"
     llm_config_dir = tmp_path / "llm"
-    mock_get_app_config.return_value = app_config_dir
-    mock_get_llm_config.return_value = llm_config_dir
+    is_initialized = MagicMock(return_value=False)
+    # One patcher for all five helpers instead of a stack of patch() calls
+    with patch.multiple(
+        "copyedit_ai.self_subcommand",
+        is_initialized=is_initialized,
+        initialize=DEFAULT,
+        get_app_config_dir=MagicMock(return_value=app_config_dir),
+        get_llm_config_dir=MagicMock(return_value=llm_config_dir),
+        get_llm_templates_dir=MagicMock(return_value=llm_config_dir / "templates"),
+    ) as mocks:
+        yield SimpleNamespace(
+            is_initialized=is_initialized,
+            initialize=mocks["initialize"],
+            app_config_dir=app_config_dir,
+            llm_config_dir=llm_config_dir,
+        )
+
+
+@patch("copyedit_ai.copyedit.templates_installed", return_value={})
+def test_cli_self_init_writes_default_template(
+    _mock_templates_installed,  # noqa: PT019
+    self_mocks: SimpleNamespace,
+) -> None:
+    """Test that init writes the default template into the llm config dir."""
+    from copyedit_ai.self_subcommand import (  # noqa: PLC0415
+        _default_template_yaml,
+        init_command,
+    )
+
+    # Only the side effect matters here, so skip the CLI round trip. The
+    # defaults are typer.Option objects, so every parameter is passed.
+    init_command(force=False, import_system_config=False)
+
+    template_path = self_mocks.llm_config_dir / "templates" / "copyedit.yaml"
+    assert template_path.read_bytes() == _default_template_yaml()
+
+
+def test_cli_self_init_follows_llm_user_path(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that init writes the template where llm loads it from."""
+    from copyedit_ai.copyedit import SYSTEM_PROMPT, load_template  # noqa: PLC0415
+
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "xdg"))
+    monkeypatch.setenv("LLM_USER_PATH", str(tmp_path / "llm"))
 
     result = runner.invoke(cli, ["self", "init"])
 
     assert result.exit_code == 0
-    assert "Initialized copyedit_ai configuration" in result.output
-    assert str(app_config_dir) in result.output
-    assert str(llm_config_dir) in result.output
-    mock_initialize.assert_called_once_with(force=False)
+    assert (tmp_path / "llm" / "templates" / "copyedit.yaml").exists()
+    assert load_template("copyedit").system == SYSTEM_PROMPT
 
 
-@patch("copyedit_ai.self_subcommand.is_initialized")
-@patch("copyedit_ai.self_subcommand.get_app_config_dir")
-@patch("copyedit_ai.self_subcommand.get_llm_config_dir")
-def test_cli_self_init_already_initialized(
-    mock_get_llm_config, mock_get_app_config, mock_is_initialized, tmp_path: Path
-) -> None:
+def test_cli_self_init(self_mocks: SimpleNamespace) -> None:
+    """Test the self init subcommand."""
+    result = runner.invoke(cli, ["self", "init"])
+
+    assert result.exit_code == 0
+    assert MSG_INITIALIZED in result.output
+    assert str(self_mocks.app_config_dir) in result.output
+    assert str(self_mocks.llm_config_dir) in result.output
+    self_mocks.initialize.assert_called_once_with(force=False)
+
+
+def test_cli_self_init_already_initialized(self_mocks: SimpleNamespace) -> None:
     """Test the self init subcommand when already initialized."""
-    # Setup mocks
-    mock_is_initialized.return_value = True
-    app_config_dir = tmp_path / "app"
-    llm_config_dir = tmp_path / "llm"
-    mock_get_app_config.return_value = app_config_dir
-    mock_get_llm_config.return_value = llm_config_dir
+    self_mocks.is_initialized.return_value = True
 
     result = runner.invoke(cli, ["self", "init"])
 
@@ -287,78 +598,61 @@ def test_cli_self_init_already_initialized(
     assert "Use --force to reinitialize" in result.output
 
 
-@patch("copyedit_ai.self_subcommand.initialize")
-@patch("copyedit_ai.self_subcommand.is_initialized")
-@patch("copyedit_ai.self_subcommand.get_app_config_dir")
-@patch("copyedit_ai.self_subcommand.get_llm_config_dir")
-def test_cli_self_init_force(
-    mock_get_llm_config,
-    mock_get_app_config,
-    mock_is_initialized,
-    mock_initialize,
-    tmp_path: Path,
-) -> None:
+def test_cli_self_init_force(self_mocks: SimpleNamespace) -> None:
     """Test the self init subcommand with --force option."""
-    # Setup mocks
-    mock_is_initialized.return_value = True
-    app_config_dir = tmp_path / "app"
-    llm_config_dir = tmp_path / "llm"
-    mock_get_app_config.return_value = app_config_dir
-    mock_get_llm_config.return_value = llm_config_dir
+    self_mocks.is_initialized.return_value = True
 
     result = runner.invoke(cli, ["self", "init", "--force"])
 
     assert result.exit_code == 0
-    assert "Initialized copyedit_ai configuration" in result.output
-    mock_initialize.assert_called_once_with(force=True)
+    assert MSG_INITIALIZED in result.output
+    self_mocks.initialize.assert_called_once_with(force=True)
 
 
 @patch("copyedit_ai.self_subcommand._import_system_llm_config")
-@patch("copyedit_ai.self_subcommand.initialize")
-@patch("copyedit_ai.self_subcommand.is_initialized")
-@patch("copyedit_ai.self_subcommand.get_app_config_dir")
-@patch("copyedit_ai.self_subcommand.get_llm_config_dir")
 def test_cli_self_init_import_system_config(
-    mock_get_llm_config,
-    mock_get_app_config,
-    mock_is_initialized,
-    _mock_initialize,  # noqa: PT019
-    mock_import,
-    tmp_path: Path,
+    mock_import, self_mocks: SimpleNamespace
 ) -> None:
     """Test the self init subcommand with --import-system-config option."""
-    # Setup mocks
-    mock_is_initialized.return_value = False
-    app_config_dir = tmp_path / "app"
-    llm_config_dir = tmp_path / "llm"
-    mock_get_app_config.return_value = app_config_dir
-    mock_get_llm_config.return_value = llm_config_dir
-
     result = runner.invoke(cli, ["self", "init", "--import-system-config"])
 
     assert result.exit_code == 0
-    assert "Initialized copyedit_ai configuration" in result.output
-    mock_import.assert_called_once_with(llm_config_dir)
+    assert MSG_INITIALIZED in result.output
+    mock_import.assert_called_once_with(self_mocks.llm_config_dir)
 
 
-@patch("copyedit_ai.self_subcommand.is_initialized")
-@patch("copyedit_ai.self_subcommand.get_app_config_dir")
-@patch("copyedit_ai.self_subcommand.get_llm_config_dir")
-def test_cli_self_check_initialized(
-    mock_get_llm_config, mock_get_app_config, mock_is_initialized, tmp_path: Path
+def test_import_system_llm_config_copies_templates_and_aliases(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
 ) -> None:
+    """Test importing templates and aliases from the system llm directory."""
+    from copyedit_ai.self_subcommand import _import_system_llm_config  # noqa: PLC0415
+
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    system_llm_dir = tmp_path / "home" / ".config" / "io.datasette.llm"
+    (system_llm_dir / "templates").mkdir(parents=True)
+    (system_llm_dir / "templates" / "copyedit.yaml").write_text("system: Edit\n")
+    (system_llm_dir / "templates" / "notes.txt").write_text("skip me\n")
+    (system_llm_dir / "aliases.json").write_text('{"fast": "gpt-4o-mini"}')
+    target_dir = tmp_path / "llm_config"
+    target_dir.mkdir()
+
+    _import_system_llm_config(target_dir)
+
+    assert (target_dir / "templates" / "copyedit.yaml").read_text() == "system: Edit\n"
+    assert not (target_dir / "templates" / "notes.txt").exists()
+    assert json.loads((target_dir / "aliases.json").read_text()) == {
+        "fast": "gpt-4o-mini"
+    }
+
+
+def test_cli_self_check_initialized(self_mocks: SimpleNamespace) -> None:
     """Test the self check subcommand when initialized."""
-    # Setup mocks
-    mock_is_initialized.return_value = True
-    app_config_dir = tmp_path / "app"
-    llm_config_dir = tmp_path / "llm"
-    llm_config_dir.mkdir(parents=True)
-    mock_get_app_config.return_value = app_config_dir
-    mock_get_llm_config.return_value = llm_config_dir
+    self_mocks.is_initialized.return_value = True
+    llm_config_dir = self_mocks.llm_config_dir
 
     # Create templates directory and a test template
     templates_dir = llm_config_dir / "templates"
-    templates_dir.mkdir()
+    templates_dir.mkdir(parents=True)
     (templates_dir / "test.yaml").write_text("test: content")
 
     # Create aliases file
@@ -369,7 +663,7 @@ def test_cli_self_check_initialized(
 
     assert result.exit_code == 0
     assert "Configuration initialized" in result.output
-    assert str(app_config_dir) in result.output
+    assert str(self_mocks.app_config_dir) in result.output
     assert str(llm_config_dir) in result.output
     assert "Templates (1)" in result.output
     assert "test" in result.output
@@ -377,40 +671,68 @@ def test_cli_self_check_initialized(
     assert "fast -> gpt-4o-mini" in result.output
 
 
-@patch("copyedit_ai.self_subcommand.is_initialized")
-@patch("copyedit_ai.self_subcommand.get_app_config_dir")
-def test_cli_self_check_not_initialized(
-    mock_get_app_config, mock_is_initialized, tmp_path: Path
-) -> None:
+@pytest.mark.usefixtures("self_mocks")
+def test_cli_self_check_not_initialized() -> None:
     """Test the self check subcommand when not initialized."""
-    # Setup mocks
-    mock_is_initialized.return_value = False
-    app_config_dir = tmp_path / "app"
-    mock_get_app_config.return_value = app_config_dir
-
     result = runner.invoke(cli, ["self", "check"])
 
     assert result.exit_code == 1
-    assert "Configuration not initialized" in result.output
-    assert "copyedit_ai self init" in result.output
+    assert MSG_NOT_INITIALIZED in result.output
+    assert MSG_RUN_INIT in result.output
 
 
-def test_cli_self_has_passthrough_commands() -> None:
-    """Test that llm passthrough commands are attached to self subcommand."""
-    import typer.main  # noqa: PLC0415
+@patch("copyedit_ai.copyedit.templates_installed")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_template_check_only_for_self(
+    mock_copyedit,
+    mock_templates_installed,
+    sample_text_file: Path,
+) -> None:
+    """Test that the templates directory is only read for 'self' commands."""
+    mock_response = _StreamStub(["Corrected text"])
+    mock_copyedit.return_value = mock_response
+    mock_templates_installed.return_value = {"copyedit": "system: ..."}
+
+    result = runner.invoke(cli, ["edit", str(sample_text_file)])
+    assert result.exit_code == 0
+    mock_templates_installed.assert_not_called()
+
+    result = runner.invoke(cli, ["self", "version"])
+    assert result.exit_code == 0
+    mock_templates_installed.assert_called_once()
 
-    from copyedit_ai.__main__ import (  # noqa: PLC0415
-        _attach_llm_passthroughs,
-        app,
+
+def test_cli_self_cache_clear() -> None:
+    """Test that 'self cache clear' removes cached responses."""
+    from copyedit_ai.cache import (  # noqa: PLC0415
+        read_cached_response,
+        response_cache_key,
+        write_cached_response,
     )
 
-    # Convert to Click and check commands
-    click_group = typer.main.get_command(app)
+    key = response_cache_key("model", "system", None, "text")
+    write_cached_response(key, "Corrected text")
+
+    result = runner.invoke(cli, ["self", "cache", "clear"])
 
-    # Attach the passthroughs
+    assert result.exit_code == 0
+    assert "Removed 1 cached response(s)" in result.output
+    assert read_cached_response(key) is None
+
+
+@pytest.fixture(scope="module")
+def click_group_with_passthroughs() -> "click.Group":
+    """Build the Click group with llm passthroughs once for this module."""
+    click_group = typer.main.get_command(cli)
     _attach_llm_passthroughs(click_group)
+    return click_group
 
-    self_command = click_group.commands.get("self")
+
+def test_cli_self_has_passthrough_commands(
+    click_group_with_passthroughs: "click.Group",
+) -> None:
+    """Test that llm passthrough commands are attached to self subcommand."""
+    self_command = click_group_with_passthroughs.commands.get("self")
     assert self_command is not None
 
     # Verify passthrough commands exist
@@ -430,174 +752,144 @@ def test_cli_self_has_passthrough_commands() -> None:
         )
 
 
-def test_cli_self_templates_help() -> None:
-    """Test that templates passthrough help works."""
-    import typer.main  # noqa: PLC0415
-    from click.testing import CliRunner as ClickRunner  # noqa: PLC0415
-
-    from copyedit_ai.__main__ import _attach_llm_passthroughs  # noqa: PLC0415
-
-    # Convert to Click and attach passthroughs
-    click_group = typer.main.get_command(cli)
-    _attach_llm_passthroughs(click_group)
-
-    # Use Click's test runner for the Click group
-    click_runner = ClickRunner()
-    result = click_runner.invoke(click_group, ["self", "templates", "--help"])
-
-    # Should show help for templates command
-    assert result.exit_code == 0
-    assert "templates" in result.output.lower()
-
-
-def test_cli_self_keys_help() -> None:
-    """Test that keys passthrough help works."""
-    import typer.main  # noqa: PLC0415
-    from click.testing import CliRunner as ClickRunner  # noqa: PLC0415
-
-    from copyedit_ai.__main__ import _attach_llm_passthroughs  # noqa: PLC0415
-
-    # Convert to Click and attach passthroughs
-    click_group = typer.main.get_command(cli)
-    _attach_llm_passthroughs(click_group)
-
-    click_runner = ClickRunner()
-    result = click_runner.invoke(click_group, ["self", "keys", "--help"])
-
-    # Should show help for keys command
-    assert result.exit_code == 0
-    assert "keys" in result.output.lower() or "api" in result.output.lower()
-
-
-def test_cli_self_models_help() -> None:
-    """Test that models passthrough help works."""
-    import typer.main  # noqa: PLC0415
-    from click.testing import CliRunner as ClickRunner  # noqa: PLC0415
-
-    from copyedit_ai.__main__ import _attach_llm_passthroughs  # noqa: PLC0415
-
-    # Convert to Click and attach passthroughs
-    click_group = typer.main.get_command(cli)
-    _attach_llm_passthroughs(click_group)
-
-    click_runner = ClickRunner()
-    result = click_runner.invoke(click_group, ["self", "models", "--help"])
-
-    # Should show help for models command
-    assert result.exit_code == 0
-    assert "model" in result.output.lower()
-
-
-def test_cli_self_aliases_help() -> None:
-    """Test that aliases passthrough help works."""
-    import typer.main  # noqa: PLC0415
-    from click.testing import CliRunner as ClickRunner  # noqa: PLC0415
-
-    from copyedit_ai.__main__ import _attach_llm_passthroughs  # noqa: PLC0415
-
-    # Convert to Click and attach passthroughs
-    click_group = typer.main.get_command(cli)
-    _attach_llm_passthroughs(click_group)
+@pytest.mark.parametrize(
+    ("argv", "expected"),
+    [
+        ([], False),
+        (["draft.txt"], False),
+        (["edit", "--no-stream", "draft.txt"], False),
+        (["batch", "a.md", "b.md"], False),
+        (["self"], True),
+        (["self", "models", "list"], True),
+        (["--debug", "self", "models"], True),
+        (["-D", "--log-file", "self", "draft.txt"], False),
+        (["--log-file", "run.log", "self", "keys"], True),
+        (["--log-file=run.log", "self", "keys"], True),
+    ],
+)
+def test_needs_llm_passthroughs(
+    argv: list[str], expected: bool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that llm passthroughs are only attached for 'self' command lines."""
+    monkeypatch.delenv("_COPYEDIT_AI_COMPLETE", raising=False)
+    assert _needs_llm_passthroughs(argv) is expected
 
-    click_runner = ClickRunner()
-    result = click_runner.invoke(click_group, ["self", "aliases", "--help"])
 
-    # Should show help for aliases command
-    assert result.exit_code == 0
-    assert "alias" in result.output.lower()
+def test_needs_llm_passthroughs_for_completion(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that shell completion always sees the passthrough commands."""
+    monkeypatch.setenv("_COPYEDIT_AI_COMPLETE", "bash_complete")
+    assert _needs_llm_passthroughs([])
 
 
-def test_cli_self_schemas_help() -> None:
-    """Test that schemas passthrough help works."""
-    import typer.main  # noqa: PLC0415
-    from click.testing import CliRunner as ClickRunner  # noqa: PLC0415
+def test_iter_template_stems(tmp_path: Path) -> None:
+    """Test that only YAML template files are listed, without the suffix."""
+    from copyedit_ai.self_subcommand import _iter_template_stems  # noqa: PLC0415
 
-    from copyedit_ai.__main__ import _attach_llm_passthroughs  # noqa: PLC0415
+    (tmp_path / "copyedit.yaml").write_text("system: Edit\n")
+    (tmp_path / "notes.txt").write_text("not a template\n")
+    (tmp_path / "nested.yaml").mkdir()
 
-    # Convert to Click and attach passthroughs
-    click_group = typer.main.get_command(cli)
-    _attach_llm_passthroughs(click_group)
+    assert list(_iter_template_stems(tmp_path)) == ["copyedit"]
 
-    click_runner = ClickRunner()
-    result = click_runner.invoke(click_group, ["self", "schemas", "--help"])
 
-    # Should show help for schemas command
-    assert result.exit_code == 0
-    assert "schema" in result.output.lower()
+@patch("copyedit_ai.settings.get_settings")
+def test_main_callback_skips_settings_during_completion(
+    mock_settings: MagicMock,
+) -> None:
+    """Test that shell completion doesn't load settings or configure logging."""
+    ctx = MagicMock(resilient_parsing=True, obj=None)
+    main_callback(ctx, debug=False, log_file=None)
 
+    mock_settings.assert_not_called()
+    assert ctx.obj is None
 
-def test_cli_self_install_help() -> None:
-    """Test that install passthrough help works."""
-    import typer.main  # noqa: PLC0415
-    from click.testing import CliRunner as ClickRunner  # noqa: PLC0415
 
-    from copyedit_ai.__main__ import _attach_llm_passthroughs  # noqa: PLC0415
+def test_get_settings_is_shared() -> None:
+    """Test that settings are loaded once and shared."""
+    from copyedit_ai.settings import get_settings  # noqa: PLC0415
 
-    # Convert to Click and attach passthroughs
-    click_group = typer.main.get_command(cli)
-    _attach_llm_passthroughs(click_group)
+    assert get_settings() is get_settings()
 
-    click_runner = ClickRunner()
-    result = click_runner.invoke(click_group, ["self", "install", "--help"])
 
-    # Should show help for install command
-    assert result.exit_code == 0
-    assert "install" in result.output.lower() or "plugin" in result.output.lower()
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_cli_batch_rejects_non_positive_concurrency_setting(
+    monkeypatch: pytest.MonkeyPatch, sample_text_file: Path, value: str
+) -> None:
+    """Test that batch refuses a concurrency setting below one."""
+    monkeypatch.setenv("COPYEDIT_AI_MAX_CONCURRENCY", value)
 
+    result = runner.invoke(cli, ["batch", str(sample_text_file)])
 
-def test_cli_self_uninstall_help() -> None:
-    """Test that uninstall passthrough help works."""
-    import typer.main  # noqa: PLC0415
-    from click.testing import CliRunner as ClickRunner  # noqa: PLC0415
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert "COPYEDIT_AI_MAX_CONCURRENCY must be at least 1" in result.output
 
-    from copyedit_ai.__main__ import _attach_llm_passthroughs  # noqa: PLC0415
 
-    # Convert to Click and attach passthroughs
-    click_group = typer.main.get_command(cli)
-    _attach_llm_passthroughs(click_group)
+def test_cli_other_commands_ignore_concurrency_setting(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a bad batch setting doesn't break unrelated commands."""
+    monkeypatch.setenv("COPYEDIT_AI_MAX_CONCURRENCY", "0")
 
-    click_runner = ClickRunner()
-    result = click_runner.invoke(click_group, ["self", "uninstall", "--help"])
+    result = runner.invoke(cli, ["edit", "--help"])
 
-    # Should show help for uninstall command
     assert result.exit_code == 0
-    assert "uninstall" in result.output.lower() or "remove" in result.output.lower()
-
-
-def test_cli_self_plugins_help() -> None:
-    """Test that plugins passthrough help works."""
-    import typer.main  # noqa: PLC0415
-    from click.testing import CliRunner as ClickRunner  # noqa: PLC0415
 
-    from copyedit_ai.__main__ import _attach_llm_passthroughs  # noqa: PLC0415
-
-    # Convert to Click and attach passthroughs
-    click_group = typer.main.get_command(cli)
-    _attach_llm_passthroughs(click_group)
 
-    click_runner = ClickRunner()
-    result = click_runner.invoke(click_group, ["self", "plugins", "--help"])
+@pytest.mark.parametrize(
+    ("command", "needles"),
+    [
+        ("templates", ("templates",)),
+        ("keys", ("keys", "api")),
+        ("models", ("model",)),
+        ("aliases", ("alias",)),
+        ("schemas", ("schema",)),
+        ("install", ("install", "plugin")),
+        ("uninstall", ("uninstall", "remove")),
+        ("plugins", ("plugin",)),
+    ],
+)
+def test_cli_self_passthrough_help(
+    click_group_with_passthroughs: "click.Group",
+    command: str,
+    needles: tuple[str, ...],
+) -> None:
+    """Test that each llm passthrough command's help works."""
+    result = ClickRunner().invoke(
+        click_group_with_passthroughs, ["self", command, "--help"]
+    )
 
-    # Should show help for plugins command
     assert result.exit_code == 0
-    assert "plugin" in result.output.lower()
+    output = result.output.lower()
+    assert any(needle in output for needle in needles)
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_replace_with_confirmation(mock_copyedit, tmp_path: Path) -> None:
-    """Test the --replace option with user confirmation."""
+@pytest.mark.parametrize("stream", [True, False], ids=["stream", "no-stream"])
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_replace_with_confirmation(
+    mock_copyedit,
+    tmp_path: Path,
+    stream: bool,
+) -> None:
+    """Test the --replace option with user confirmation, with and without streaming."""
     # Create a temporary test file
     test_file = tmp_path / "test.txt"
     original_content = "Test text with erors."
     test_file.write_text(original_content)
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Test text with errors."]))
-    mock_copyedit.return_value = mock_response
+    if stream:
+        mock_copyedit.return_value = _StreamStub(["Test text with errors."])
+        stream_args = []
+    else:
+        mock_copyedit.return_value = _LLMResponseStub("Test text with errors.")
+        stream_args = ["--no-stream"]
 
     # Simulate user confirming the replacement
-    result = runner.invoke(cli, ["edit", str(test_file), "--replace"], input="y\n")
+    result = runner.invoke(
+        cli, ["edit", str(test_file), "--replace", *stream_args], input="y\n"
+    )
 
     assert result.exit_code == 0
     mock_copyedit.assert_called_once()
@@ -616,8 +908,82 @@ def test_cli_replace_with_confirmation(mock_copyedit, tmp_path: Path) -> None:
     assert "Backup saved to" in result.output
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_replace_with_cancellation(mock_copyedit, tmp_path: Path) -> None:
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_replace_edits_symlink_target(mock_copyedit, tmp_path: Path) -> None:
+    """Test that --replace on a symlink edits its target and keeps the link."""
+    target = tmp_path / "target.txt"
+    target.write_text("Test text with erors.")
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+    mock_copyedit.return_value = _LLMResponseStub("Test text with errors.")
+
+    result = runner.invoke(
+        cli, ["edit", str(link), "--replace", "--no-stream"], input="y\n"
+    )
+
+    assert result.exit_code == 0, result.output
+    assert link.is_symlink()
+    assert link.resolve() == target
+    assert target.read_text() == "Test text with errors.\n"
+    # The backup sits next to the file that was actually edited
+    assert (tmp_path / "target.txt.bak").read_text() == "Test text with erors."
+
+
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_replace_keeps_hard_links(mock_copyedit, tmp_path: Path) -> None:
+    """Test that --replace rewrites a hard-linked file in place."""
+    test_file = tmp_path / "test.txt"
+    test_file.write_text("Test text with erors.")
+    other_link = tmp_path / "other.txt"
+    other_link.hardlink_to(test_file)
+    mock_copyedit.return_value = _LLMResponseStub("Test text with errors.")
+
+    result = runner.invoke(
+        cli, ["edit", str(test_file), "--replace", "--no-stream"], input="y\n"
+    )
+
+    assert result.exit_code == 0, result.output
+    assert test_file.samefile(other_link)
+    assert other_link.read_text() == "Test text with errors.\n"
+    # The backup is a copy, not another link to the rewritten file
+    assert (tmp_path / "test.txt.bak").read_text() == "Test text with erors."
+
+
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_replace_renames_temp_file_over_original(
+    mock_copyedit,
+    tmp_path: Path,
+) -> None:
+    """Test that --replace keeps permissions and leaves no temp file behind."""
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    test_file = docs_dir / "test.txt"
+    test_file.write_text("Original text.")
+    file_mode = 0o640
+    test_file.chmod(file_mode)
+
+    mock_response = _StreamStub(["Corrected text."])
+    mock_copyedit.return_value = mock_response
+
+    result = runner.invoke(
+        cli, ["edit", str(test_file), "--replace", "--no-markdown"], input="y\n"
+    )
+
+    assert result.exit_code == 0
+    assert test_file.read_text() == "Corrected text."
+    assert test_file.stat().st_mode & 0o777 == file_mode
+    assert (docs_dir / "test.txt.bak").read_text() == "Original text."
+    assert sorted(path.name for path in docs_dir.iterdir()) == [
+        "test.txt",
+        "test.txt.bak",
+    ]
+
+
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_replace_with_cancellation(
+    mock_copyedit,
+    tmp_path: Path,
+) -> None:
     """Test the --replace option with user cancellation."""
     # Create a temporary test file
     test_file = tmp_path / "test.txt"
@@ -625,8 +991,7 @@ def test_cli_replace_with_cancellation(mock_copyedit, tmp_path: Path) -> None:
     test_file.write_text(original_content)
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Test text with errors."]))
+    mock_response = _StreamStub(["Test text with errors."])
     mock_copyedit.return_value = mock_response
 
     # Simulate user cancelling the replacement
@@ -647,12 +1012,11 @@ def test_cli_replace_with_cancellation(mock_copyedit, tmp_path: Path) -> None:
     assert "Copyedited version saved in" in result.output
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_replace_with_stdin_error(mock_copyedit) -> None:
     """Test that --replace with stdin input produces an error."""
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Test text with errors."]))
+    mock_response = _StreamStub(["Test text with errors."])
     mock_copyedit.return_value = mock_response
 
     test_input = "Test text with erors."
@@ -662,81 +1026,115 @@ def test_cli_replace_with_stdin_error(mock_copyedit) -> None:
     assert "--replace requires a file argument" in result.output
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_replace_no_stream(mock_copyedit, tmp_path: Path) -> None:
-    """Test the --replace option with --no-stream."""
-    # Create a temporary test file
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_replace_unchanged_content_skips_backup(
+    mock_copyedit,
+    tmp_path: Path,
+) -> None:
+    """Test that --replace leaves the file alone when nothing changed."""
     test_file = tmp_path / "test.txt"
-    original_content = "Test text with erors."
-    test_file.write_text(original_content)
+    test_file.write_text("Already clean text.")
 
-    # Mock the copyedit response for non-streaming
-    mock_response = create_autospec(llm.Response, instance=True)
-    mock_response.text.return_value = "Test text with errors."
+    mock_response = _StreamStub(["Already clean text."])
     mock_copyedit.return_value = mock_response
 
-    # Simulate user confirming the replacement
     result = runner.invoke(
-        cli, ["edit", str(test_file), "--replace", "--no-stream"], input="y\n"
+        cli, ["edit", str(test_file), "--replace", "--no-markdown"], input="y\n"
     )
 
     assert result.exit_code == 0
-    mock_copyedit.assert_called_once()
+    assert "No changes needed" in result.output
+    assert "Replace the original file" not in result.output
+    assert test_file.read_text() == "Already clean text."
+    assert not (tmp_path / "test.txt.bak").exists()
 
-    # Verify the file was replaced (mdformat.text adds a trailing newline)
-    assert test_file.read_text() == "Test text with errors.\n"
 
-    # Verify backup was created
-    backup_path = tmp_path / "test.txt.bak"
-    assert backup_path.exists()
-    assert backup_path.read_text() == original_content
+@patch("copyedit_ai.__main__._make_replacement_temp_file")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_replace_stream_error_removes_temp_file(
+    mock_copyedit, mock_make_temp, tmp_path: Path
+) -> None:
+    """Test that a failed stream in --replace mode cleans up its temp file."""
+    test_file = tmp_path / "test.txt"
+    test_file.write_text("Original text.")
+    temp_file = tmp_path / "test_copyedit_partial.txt"
+    temp_file.touch()
+    mock_make_temp.return_value = temp_file
 
+    def failing_stream() -> "Iterator[str]":
+        yield "Partial "
+        msg = "connection reset"
+        raise RuntimeError(msg)
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_no_log_file_by_default(mock_copyedit, tmp_path: Path) -> None:
-    """Test that no log file is created by default."""
-    # Create a temporary test file
+    mock_copyedit.return_value = failing_stream()
+
+    result = runner.invoke(
+        cli, ["edit", str(test_file), "--replace", "--no-markdown"], input="y\n"
+    )
+
+    assert result.exit_code == 1
+    assert "connection reset" in result.output
+    assert not temp_file.exists()
+    assert test_file.read_text() == "Original text."
+
+
+@patch("copyedit_ai.__main__.os.access")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_replace_unwritable_directory_error(
+    mock_copyedit, mock_access, tmp_path: Path
+) -> None:
+    """Test that --replace fails before the LLM call if the file can't be replaced."""
     test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
+    test_file.write_text("Original text.")
+    # Readable, but the directory is not writable
+    mock_access.side_effect = lambda _path, mode, **_kwargs: mode != os.W_OK
 
+    result = runner.invoke(cli, ["edit", "--replace", str(test_file)])
+
+    assert result.exit_code == 1
+    assert "requires write access" in result.output
+    mock_copyedit.assert_not_called()
+    assert test_file.read_text() == "Original text."
+
+
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_no_log_file_by_default(
+    mock_copyedit,
+    tmp_path: Path,
+    sample_text_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that no log file is created by default."""
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     # Run in the tmp_path directory
-    import os  # noqa: PLC0415
-
-    original_cwd = Path.cwd()
-    try:
-        os.chdir(tmp_path)
-        result = runner.invoke(cli, ["edit", str(test_file)])
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(cli, ["edit", str(sample_text_file)])
 
-        assert result.exit_code == 0
+    assert result.exit_code == 0
 
-        # Verify no log file was created in the current directory
-        assert not (tmp_path / "copyedit_ai.log").exists()
-    finally:
-        os.chdir(original_cwd)
+    # Verify no log file was created in the current directory
+    assert not (tmp_path / "copyedit_ai.log").exists()
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_with_log_file_option(mock_copyedit, tmp_path: Path) -> None:
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_with_log_file_option(
+    mock_copyedit,
+    tmp_path: Path,
+    sample_text_file: Path,
+) -> None:
     """Test that log file is created when --log-file is specified."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     # Specify log file path
     log_file_path = tmp_path / "custom.log"
 
     result = runner.invoke(
-        cli, ["--log-file", str(log_file_path), "edit", str(test_file)]
+        cli, ["--log-file", str(log_file_path), "edit", str(sample_text_file)]
     )
 
     assert result.exit_code == 0, f"Output: {result.output}"
@@ -752,32 +1150,29 @@ def test_cli_with_log_file_option(mock_copyedit, tmp_path: Path) -> None:
     assert "Logging to file:" in log_content or "debug=" in log_content
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_startup_message_with_file(mock_copyedit, tmp_path: Path) -> None:
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_startup_message_with_file(
+    mock_copyedit,
+    sample_text_file: Path,
+) -> None:
     """Test that startup message shows the filename."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
-    result = runner.invoke(cli, ["edit", str(test_file)])
+    result = runner.invoke(cli, ["edit", str(sample_text_file)])
 
     assert result.exit_code == 0
     # The startup message goes to stderr (Rich Console is configured with stderr=True)
     # Typer's CliRunner captures both stdout and stderr in output
-    assert "Copyediting:" in result.output or str(test_file) in result.output
+    assert MSG_COPYEDITING in result.output or str(sample_text_file) in result.output
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_startup_message_with_stdin(mock_copyedit) -> None:
     """Test that startup message shows 'stdin' when reading from stdin."""
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     test_input = "Test text from stdin."
@@ -785,26 +1180,23 @@ def test_cli_startup_message_with_stdin(mock_copyedit) -> None:
 
     assert result.exit_code == 0
     # Check for startup message mentioning stdin
-    assert "Copyediting:" in result.output or "stdin" in result.output
+    assert MSG_COPYEDITING in result.output or "stdin" in result.output
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_wrap_width_default(mock_copyedit, mock_mdformat, tmp_path: Path) -> None:
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_wrap_width_default(
+    mock_copyedit, mock_mdformat, sample_text_file: Path
+) -> None:
     """Test that the default wrap width is 80."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _LLMResponseStub("Corrected text")
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text to return the input unchanged
     mock_mdformat.return_value = "Corrected text"
 
-    result = runner.invoke(cli, ["edit", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--no-stream", str(sample_text_file)])
 
     assert result.exit_code == 0
     mock_copyedit.assert_called_once()
@@ -817,23 +1209,22 @@ def test_cli_wrap_width_default(mock_copyedit, mock_mdformat, tmp_path: Path) ->
     )
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_wrap_width_custom(mock_copyedit, mock_mdformat, tmp_path: Path) -> None:
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_wrap_width_custom(
+    mock_copyedit, mock_mdformat, sample_text_file: Path
+) -> None:
     """Test that custom wrap width is passed to mdformat."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _LLMResponseStub("Corrected text")
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text to return the input unchanged
     mock_mdformat.return_value = "Corrected text"
 
-    result = runner.invoke(cli, ["edit", "--wrap-width", "120", str(test_file)])
+    result = runner.invoke(
+        cli, ["edit", "--no-stream", "--wrap-width", "120", str(sample_text_file)]
+    )
 
     assert result.exit_code == 0
     mock_copyedit.assert_called_once()
@@ -846,25 +1237,24 @@ def test_cli_wrap_width_custom(mock_copyedit, mock_mdformat, tmp_path: Path) ->
     )
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_wrap_width_short_option(
-    mock_copyedit, mock_mdformat, tmp_path: Path
+    mock_copyedit,
+    mock_mdformat,
+    sample_text_file: Path,
 ) -> None:
     """Test that the -w short option works for wrap width."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _LLMResponseStub("Corrected text")
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text to return the input unchanged
     mock_mdformat.return_value = "Corrected text"
 
-    result = runner.invoke(cli, ["edit", "-w", "72", str(test_file)])
+    result = runner.invoke(
+        cli, ["edit", "--no-stream", "-w", "72", str(sample_text_file)]
+    )
 
     assert result.exit_code == 0
     mock_copyedit.assert_called_once()
@@ -877,26 +1267,23 @@ def test_cli_wrap_width_short_option(
     )
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_wrap_width_with_no_stream(
-    mock_copyedit, mock_mdformat, tmp_path: Path
+    mock_copyedit,
+    mock_mdformat,
+    sample_text_file: Path,
 ) -> None:
     """Test that wrap width works correctly with --no-stream option."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response for non-streaming
-    mock_response = create_autospec(llm.Response, instance=True)
-    mock_response.text.return_value = "Corrected text without streaming"
+    mock_response = _LLMResponseStub("Corrected text without streaming")
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text to return the input unchanged
     mock_mdformat.return_value = "Corrected text without streaming"
 
     result = runner.invoke(
-        cli, ["edit", "--no-stream", "--wrap-width", "100", str(test_file)]
+        cli, ["edit", "--no-stream", "--wrap-width", "100", str(sample_text_file)]
     )
 
     assert result.exit_code == 0
@@ -910,19 +1297,19 @@ def test_cli_wrap_width_with_no_stream(
     )
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_wrap_width_with_replace(
-    mock_copyedit, mock_mdformat, tmp_path: Path
+    mock_copyedit,
+    mock_mdformat,
+    tmp_path: Path,
 ) -> None:
     """Test that wrap width works correctly with --replace option."""
-    # Create a temporary test file
     test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
+    test_file.write_bytes(b"Test text.")
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text to return the input unchanged
@@ -947,23 +1334,20 @@ def test_cli_wrap_width_with_replace(
     assert test_file.read_text() == "Corrected text"
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_markdown_default(mock_copyedit, mock_mdformat, tmp_path: Path) -> None:
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_markdown_default(
+    mock_copyedit, mock_mdformat, sample_text_file: Path
+) -> None:
     """Test that markdown formatting is enabled by default."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _LLMResponseStub("Corrected text")
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text to return the input unchanged
     mock_mdformat.return_value = "Corrected text"
 
-    result = runner.invoke(cli, ["edit", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--no-stream", str(sample_text_file)])
 
     assert result.exit_code == 0
     mock_copyedit.assert_called_once()
@@ -972,23 +1356,22 @@ def test_cli_markdown_default(mock_copyedit, mock_mdformat, tmp_path: Path) -> N
     mock_mdformat.assert_called_once()
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_no_markdown(mock_copyedit, mock_mdformat, tmp_path: Path) -> None:
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_no_markdown(
+    mock_copyedit,
+    mock_mdformat,
+    sample_text_file: Path,
+) -> None:
     """Test that --no-markdown disables markdown formatting."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text (should not be called)
     mock_mdformat.return_value = "Should not be called"
 
-    result = runner.invoke(cli, ["edit", "--no-markdown", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--no-markdown", str(sample_text_file)])
 
     assert result.exit_code == 0
     mock_copyedit.assert_called_once()
@@ -997,26 +1380,23 @@ def test_cli_no_markdown(mock_copyedit, mock_mdformat, tmp_path: Path) -> None:
     mock_mdformat.assert_not_called()
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_no_markdown_with_no_stream(
-    mock_copyedit, mock_mdformat, tmp_path: Path
+    mock_copyedit,
+    mock_mdformat,
+    sample_text_file: Path,
 ) -> None:
     """Test that --no-markdown works with --no-stream option."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response for non-streaming
-    mock_response = create_autospec(llm.Response, instance=True)
-    mock_response.text.return_value = "Corrected text without streaming"
+    mock_response = _LLMResponseStub("Corrected text without streaming")
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text (should not be called)
     mock_mdformat.return_value = "Should not be called"
 
     result = runner.invoke(
-        cli, ["edit", "--no-stream", "--no-markdown", str(test_file)]
+        cli, ["edit", "--no-stream", "--no-markdown", str(sample_text_file)]
     )
 
     assert result.exit_code == 0
@@ -1026,10 +1406,12 @@ def test_cli_no_markdown_with_no_stream(
     mock_mdformat.assert_not_called()
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_no_markdown_with_replace(
-    mock_copyedit, mock_mdformat, tmp_path: Path
+    mock_copyedit,
+    mock_mdformat,
+    tmp_path: Path,
 ) -> None:
     """Test that --no-markdown works with --replace option."""
     # Create a temporary test file
@@ -1038,8 +1420,7 @@ def test_cli_no_markdown_with_replace(
     test_file.write_text(original_content)
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text (should not be called)
@@ -1060,26 +1441,31 @@ def test_cli_no_markdown_with_replace(
     assert test_file.read_text() == "Corrected text"
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_markdown_with_wrap_width(
-    mock_copyedit, mock_mdformat, tmp_path: Path
+    mock_copyedit,
+    mock_mdformat,
+    sample_text_file: Path,
 ) -> None:
     """Test that --markdown and --wrap-width work together."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _LLMResponseStub("Corrected text")
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text to return the input unchanged
     mock_mdformat.return_value = "Corrected text"
 
     result = runner.invoke(
-        cli, ["edit", "--markdown", "--wrap-width", "100", str(test_file)]
+        cli,
+        [
+            "edit",
+            "--no-stream",
+            "--markdown",
+            "--wrap-width",
+            "100",
+            str(sample_text_file),
+        ],
     )
 
     assert result.exit_code == 0
@@ -1093,26 +1479,23 @@ def test_cli_markdown_with_wrap_width(
     )
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_no_markdown_ignores_wrap_width(
-    mock_copyedit, mock_mdformat, tmp_path: Path
+    mock_copyedit,
+    mock_mdformat,
+    sample_text_file: Path,
 ) -> None:
     """Test that --no-markdown ignores --wrap-width since formatting is disabled."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter(["Corrected text"]))
+    mock_response = _StreamStub(["Corrected text"])
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text (should not be called)
     mock_mdformat.return_value = "Should not be called"
 
     result = runner.invoke(
-        cli, ["edit", "--no-markdown", "--wrap-width", "100", str(test_file)]
+        cli, ["edit", "--no-markdown", "--wrap-width", "100", str(sample_text_file)]
     )
 
     assert result.exit_code == 0
@@ -1125,15 +1508,12 @@ def test_cli_no_markdown_ignores_wrap_width(
 # Integration tests for actual word wrapping execution
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_executed_with_default_settings(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    sample_text_file: Path,
 ) -> None:
     """Test that word wrapping is actually executed with default settings."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Create a long line that should be wrapped at 90 characters
     long_line = (
         "This is a very long line that definitely exceeds ninety "
@@ -1142,11 +1522,10 @@ def test_cli_word_wrapping_executed_with_default_settings(
     )
 
     # Mock the copyedit response with a long line
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([long_line]))
+    mock_response = _StreamStub([long_line])
     mock_copyedit.return_value = mock_response
 
-    result = runner.invoke(cli, ["edit", str(test_file)])
+    result = runner.invoke(cli, ["edit", str(sample_text_file)])
 
     assert result.exit_code == 0
 
@@ -1162,15 +1541,12 @@ def test_cli_word_wrapping_executed_with_default_settings(
     assert any(len(line) < len(long_line) for line in content_lines if line.strip())
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_executed_with_custom_width(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    sample_text_file: Path,
 ) -> None:
     """Test that word wrapping is executed with custom wrap width."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Create a line that would fit in 90 chars but not in 50
     medium_line = (
         "This is a medium length line that fits in ninety "
@@ -1178,12 +1554,11 @@ def test_cli_word_wrapping_executed_with_custom_width(
     )
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([medium_line]))
+    mock_response = _StreamStub([medium_line])
     mock_copyedit.return_value = mock_response
 
     # Use a custom wrap width of 50
-    result = runner.invoke(cli, ["edit", "--wrap-width", "50", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--wrap-width", "50", str(sample_text_file)])
 
     assert result.exit_code == 0
 
@@ -1201,15 +1576,12 @@ def test_cli_word_wrapping_executed_with_custom_width(
     )
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_not_executed_with_no_markdown(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    sample_text_file: Path,
 ) -> None:
     """Test that word wrapping is NOT executed when --no-markdown is set."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Create a very long line
     long_line = (
         "This is a very long line that definitely exceeds ninety "
@@ -1218,11 +1590,10 @@ def test_cli_word_wrapping_not_executed_with_no_markdown(
     )
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([long_line]))
+    mock_response = _StreamStub([long_line])
     mock_copyedit.return_value = mock_response
 
-    result = runner.invoke(cli, ["edit", "--no-markdown", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--no-markdown", str(sample_text_file)])
 
     assert result.exit_code == 0
 
@@ -1237,42 +1608,36 @@ def test_cli_word_wrapping_not_executed_with_no_markdown(
     )
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_word_wrapping_executed_in_streaming_mode(
-    mock_copyedit, tmp_path: Path
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_streaming_mode_writes_chunks_unformatted(
+    mock_copyedit,
+    mock_mdformat,
+    sample_text_file: Path,
 ) -> None:
-    """Test that word wrapping is executed in streaming mode."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
+    """Test that streamed console output is written as-is, without mdformat."""
     # Create chunks that form a long line when combined
     chunk1 = "This is a very long line that definitely exceeds ninety characters "
-    chunk2 = "and should be wrapped by mdformat even when streaming is enabled."
+    chunk2 = "and is written to the console exactly as it was streamed."
 
     # Mock the copyedit response with streaming chunks
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([chunk1, chunk2]))
+    mock_response = _StreamStub([chunk1, chunk2])
     mock_copyedit.return_value = mock_response
 
-    result = runner.invoke(cli, ["edit", "--stream", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--stream", str(sample_text_file)])
 
     assert result.exit_code == 0
-
-    # Even in streaming mode, the final output should be wrapped
-    # Note: In streaming mode, chunks are output as they arrive,
-    # but mdformat is still applied to the collected text
+    assert chunk1 + chunk2 in result.output
+    # The streamed text is never collected, so it is not reformatted
+    mock_mdformat.assert_not_called()
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_executed_in_non_streaming_mode(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    sample_text_file: Path,
 ) -> None:
     """Test that word wrapping is executed in non-streaming mode."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Create a long line
     long_line = (
         "This is a very long line that definitely exceeds ninety "
@@ -1281,11 +1646,10 @@ def test_cli_word_wrapping_executed_in_non_streaming_mode(
     )
 
     # Mock the copyedit response for non-streaming
-    mock_response = create_autospec(llm.Response, instance=True)
-    mock_response.text.return_value = long_line
+    mock_response = _LLMResponseStub(long_line)
     mock_copyedit.return_value = mock_response
 
-    result = runner.invoke(cli, ["edit", "--no-stream", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--no-stream", str(sample_text_file)])
 
     assert result.exit_code == 0
 
@@ -1295,14 +1659,14 @@ def test_cli_word_wrapping_executed_in_non_streaming_mode(
     assert len(output) > 0
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_executed_with_replace_mode(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    tmp_path: Path,
 ) -> None:
     """Test that word wrapping is executed and written to file in replace mode."""
-    # Create a temporary test file
     test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
+    test_file.write_bytes(b"Test text.")
 
     # Create a long line that should be wrapped
     long_line = (
@@ -1312,13 +1676,14 @@ def test_cli_word_wrapping_executed_with_replace_mode(
     )
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([long_line]))
+    mock_response = _StreamStub([long_line])
     mock_copyedit.return_value = mock_response
 
     # Simulate user confirming the replacement
     result = runner.invoke(
-        cli, ["edit", "--replace", "--wrap-width", "60", str(test_file)], input="y\n"
+        cli,
+        ["edit", "--replace", "--wrap-width", "60", str(test_file)],
+        input="y\n",
     )
 
     assert result.exit_code == 0
@@ -1340,9 +1705,10 @@ def test_cli_word_wrapping_executed_with_replace_mode(
     )
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_not_executed_with_no_markdown_and_replace(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    tmp_path: Path,
 ) -> None:
     """Test that word wrapping is NOT executed with --no-markdown in replace mode."""
     # Create a temporary test file
@@ -1358,8 +1724,7 @@ def test_cli_word_wrapping_not_executed_with_no_markdown_and_replace(
     )
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([long_line]))
+    mock_response = _StreamStub([long_line])
     mock_copyedit.return_value = mock_response
 
     # Simulate user confirming the replacement
@@ -1377,15 +1742,12 @@ def test_cli_word_wrapping_not_executed_with_no_markdown_and_replace(
     )
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_with_multiple_paragraphs(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    sample_text_file: Path,
 ) -> None:
     """Test that word wrapping handles multiple paragraphs correctly."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Create multiple paragraphs with long lines
     paragraph1 = (
         "This is the first paragraph with a very long line that "
@@ -1398,26 +1760,22 @@ def test_cli_word_wrapping_with_multiple_paragraphs(
     text_with_paragraphs = f"{paragraph1}\n\n{paragraph2}"
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([text_with_paragraphs]))
+    mock_response = _StreamStub([text_with_paragraphs])
     mock_copyedit.return_value = mock_response
 
-    result = runner.invoke(cli, ["edit", "--wrap-width", "70", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--wrap-width", "70", str(sample_text_file)])
 
     assert result.exit_code == 0
 
     # The output should preserve paragraph breaks while wrapping lines
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_combination_stream_and_custom_width(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    sample_text_file: Path,
 ) -> None:
     """Test word wrapping with --stream and custom --wrap-width together."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Create a long line
     long_line = (
         "This is a very long line that should be wrapped at the "
@@ -1425,27 +1783,23 @@ def test_cli_word_wrapping_combination_stream_and_custom_width(
     )
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([long_line]))
+    mock_response = _StreamStub([long_line])
     mock_copyedit.return_value = mock_response
 
     result = runner.invoke(
-        cli, ["edit", "--stream", "--wrap-width", "40", str(test_file)]
+        cli, ["edit", "--stream", "--wrap-width", "40", str(sample_text_file)]
     )
 
     # Just verify the command executes successfully
     assert result.exit_code == 0
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_combination_no_stream_and_custom_width(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    sample_text_file: Path,
 ) -> None:
     """Test word wrapping with --no-stream and custom --wrap-width together."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Create a long line
     long_line = (
         "This is a very long line that should be wrapped at the "
@@ -1453,28 +1807,25 @@ def test_cli_word_wrapping_combination_no_stream_and_custom_width(
     )
 
     # Mock the copyedit response for non-streaming
-    mock_response = create_autospec(llm.Response, instance=True)
-    mock_response.text.return_value = long_line
+    mock_response = _LLMResponseStub(long_line)
     mock_copyedit.return_value = mock_response
 
     result = runner.invoke(
-        cli, ["edit", "--no-stream", "--wrap-width", "80", str(test_file)]
+        cli, ["edit", "--no-stream", "--wrap-width", "80", str(sample_text_file)]
     )
 
     # Just verify the command executes successfully
     assert result.exit_code == 0
 
 
-@patch("copyedit_ai.__main__.mdformat.text")
-@patch("copyedit_ai.__main__.copyedit")
+@patch("mdformat.text")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_word_wrapping_validation_warning(
-    mock_copyedit, mock_mdformat, tmp_path: Path
+    mock_copyedit,
+    mock_mdformat,
+    sample_text_file: Path,
 ) -> None:
     """Test that a warning is emitted when word wrapping doesn't appear to work."""
-    # Create a temporary test file
-    test_file = tmp_path / "test.txt"
-    test_file.write_text("Test text.")
-
     # Create multiple very long lines that exceed the wrap width
     # Using .join() is clearer than f-strings for multi-line text
     long_lines = "\n".join(  # noqa: FLY002
@@ -1499,22 +1850,24 @@ def test_cli_word_wrapping_validation_warning(
     )
 
     # Mock the copyedit response
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([long_lines]))
+    mock_response = _StreamStub([long_lines])
     mock_copyedit.return_value = mock_response
 
     # Mock mdformat.text to return the text unchanged (simulating wrapping failure)
     mock_mdformat.return_value = long_lines
 
-    result = runner.invoke(cli, ["edit", "--wrap-width", "50", str(test_file)])
+    result = runner.invoke(cli, ["edit", "--wrap-width", "50", str(sample_text_file)])
 
     assert result.exit_code == 0
     # Check that a warning about wrapping was emitted
     assert "Warning" in result.output or "wrap" in result.output.lower()
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_preserves_yaml_frontmatter(mock_copyedit, tmp_path: Path) -> None:
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_preserves_yaml_frontmatter(
+    mock_copyedit,
+    tmp_path: Path,
+) -> None:
     """Test that YAML frontmatter is preserved when _perform_copyedit is run."""
     # Create the test document with YAML frontmatter
     test_file = tmp_path / "test_doc.md"
@@ -1542,8 +1895,7 @@ Microphone check. One, two! One, two!
 
 Is this thing on?
 """
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([copyedited_text]))
+    mock_response = _StreamStub([copyedited_text])
     mock_copyedit.return_value = mock_response
 
     # Run copyedit on the file
@@ -1561,9 +1913,10 @@ Is this thing on?
     assert "Microphone check" in output
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_preserves_yaml_frontmatter_from_test_file(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    tmp_path: Path,
 ) -> None:
     """Test that YAML frontmatter is preserved using the actual test_doc.md file."""
     # Read the actual test document
@@ -1575,8 +1928,7 @@ def test_cli_preserves_yaml_frontmatter_from_test_file(
     test_file.write_text(test_content)
 
     # Mock the copyedit response to return the same content
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([test_content]))
+    mock_response = _StreamStub([test_content])
     mock_copyedit.return_value = mock_response
 
     # Run copyedit on the file
@@ -1594,9 +1946,10 @@ def test_cli_preserves_yaml_frontmatter_from_test_file(
     assert "Microphone check" in output
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_preserves_yaml_frontmatter_in_replace_mode(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    tmp_path: Path,
 ) -> None:
     """Test that YAML frontmatter is preserved when replacing a file."""
     # Create the test document with YAML frontmatter
@@ -1624,8 +1977,7 @@ Microphone check. One, two! One, two!
 
 Is this thing on?
 """
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([copyedited_text]))
+    mock_response = _StreamStub([copyedited_text])
     mock_copyedit.return_value = mock_response
 
     # Run copyedit with --replace and confirm
@@ -1655,9 +2007,10 @@ Is this thing on?
     assert "Testing, Testing!" in backup_content
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_preserves_yaml_frontmatter_from_test_file_replace_mode(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    tmp_path: Path,
 ) -> None:
     """Test YAML frontmatter preservation in replace mode using test_doc.md file."""
     # Read the actual test document
@@ -1669,8 +2022,7 @@ def test_cli_preserves_yaml_frontmatter_from_test_file_replace_mode(
     test_file.write_text(original_content)
 
     # Mock the copyedit response to return the same content
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([original_content]))
+    mock_response = _StreamStub([original_content])
     mock_copyedit.return_value = mock_response
 
     # Run copyedit with --replace and confirm
@@ -1699,8 +2051,11 @@ def test_cli_preserves_yaml_frontmatter_from_test_file_replace_mode(
     assert "Testing, Testing!" in backup_content
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_preserves_toml_frontmatter(mock_copyedit, tmp_path: Path) -> None:
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_preserves_toml_frontmatter(
+    mock_copyedit,
+    tmp_path: Path,
+) -> None:
     """Test that TOML frontmatter is preserved when _perform_copyedit is run."""
     # Create the test document with TOML frontmatter
     test_file = tmp_path / "test_doc.md"
@@ -1727,8 +2082,7 @@ Microphone check. One, two! One, two!
 
 Is this thing on?
 """
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([copyedited_text]))
+    mock_response = _StreamStub([copyedited_text])
     mock_copyedit.return_value = mock_response
 
     # Run copyedit on the file
@@ -1749,9 +2103,10 @@ Is this thing on?
     assert "Microphone check" in output
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_preserves_toml_frontmatter_in_replace_mode(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    tmp_path: Path,
 ) -> None:
     """Test that TOML frontmatter is preserved when replacing a file."""
     # Create the test document with TOML frontmatter
@@ -1777,10 +2132,9 @@ author = "J. Random User"
 
 Microphone check. One, two! One, two!
 
-Is this thing on?
+Is this thing on? Yes, it is.
 """
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([copyedited_text]))
+    mock_response = _StreamStub([copyedited_text])
     mock_copyedit.return_value = mock_response
 
     # Run copyedit with --replace and confirm
@@ -1808,8 +2162,11 @@ Is this thing on?
     assert "Testing, Testing!" in backup_content
 
 
-@patch("copyedit_ai.__main__.copyedit")
-def test_cli_preserves_json_frontmatter(mock_copyedit, tmp_path: Path) -> None:
+@patch("copyedit_ai.copyedit.copyedit")
+def test_cli_preserves_json_frontmatter(
+    mock_copyedit,
+    tmp_path: Path,
+) -> None:
     """Test that JSON frontmatter is preserved when _perform_copyedit is run."""
     # Create the test document with JSON frontmatter
     test_file = tmp_path / "test_doc.md"
@@ -1836,8 +2193,7 @@ Microphone check. One, two! One, two!
 
 Is this thing on?
 """
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([copyedited_text]))
+    mock_response = _StreamStub([copyedited_text])
     mock_copyedit.return_value = mock_response
 
     # Run copyedit on the file
@@ -1859,9 +2215,10 @@ Is this thing on?
     assert "Microphone check" in output
 
 
-@patch("copyedit_ai.__main__.copyedit")
+@patch("copyedit_ai.copyedit.copyedit")
 def test_cli_preserves_json_frontmatter_in_replace_mode(
-    mock_copyedit, tmp_path: Path
+    mock_copyedit,
+    tmp_path: Path,
 ) -> None:
     """Test that JSON frontmatter is preserved when replacing a file."""
     # Create the test document with JSON frontmatter
@@ -1889,8 +2246,7 @@ Microphone check. One, two! One, two!
 
 Is this thing on?
 """
-    mock_response = MagicMock()
-    mock_response.__iter__ = MagicMock(return_value=iter([copyedited_text]))
+    mock_response = _StreamStub([copyedited_text])
     mock_copyedit.return_value = mock_response
 
     # Run copyedit with --replace and confirm
@@ -1917,3 +2273,45 @@ Is this thing on?
     backup_content = backup_path.read_text()
     assert "{" in backup_content
     assert "Testing, Testing!" in backup_content
+
+
+def test_buffered_stream_writer_flushes_when_full() -> None:
+    """Test that streamed chunks are batched until the buffer fills."""
+    stream = io.BytesIO()
+    writer = _BufferedStreamWriter(stream, buffer_size=16, flush_interval=60)
+
+    writer.write("Hello, ")
+    writer.write("wörld!\n")
+    assert stream.getvalue() == b""
+
+    writer.write("More text")
+    assert stream.getvalue() == "Hello, wörld!\nMore text".encode()
+
+    writer.write("!")
+    assert stream.getvalue() == "Hello, wörld!\nMore text".encode()
+    writer.flush()
+    assert stream.getvalue() == "Hello, wörld!\nMore text!".encode()
+
+
+def test_buffered_stream_writer_flushes_after_interval() -> None:
+    """Test that a slow stream is written out without waiting to fill."""
+    stream = io.BytesIO()
+    writer = _BufferedStreamWriter(stream, buffer_size=1024, flush_interval=0)
+
+    writer.write("A long paragraph ")
+    assert stream.getvalue() == b"A long paragraph "
+
+
+def test_buffered_stream_writer_flushes_during_stall() -> None:
+    """Test that a held-back chunk is written while the stream pauses."""
+    stream = io.BytesIO()
+    writer = _BufferedStreamWriter(stream, buffer_size=1024, flush_interval=0.05)
+
+    writer.write("Buffered")
+    assert stream.getvalue() == b""
+
+    # No further chunk arrives; the timer writes the buffer on its own
+    deadline = time.monotonic() + 5
+    while not stream.getvalue() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stream.getvalue() == b"Buffered"
@@ -1,10 +1,34 @@
 """Test copyedit_ai core copyediting functionality."""
 
-from unittest.mock import MagicMock, patch
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call, patch
 
+import llm
 import pytest
+from llm.cli import load_template as llm_load_template
 
-from copyedit_ai.copyedit import JSON_SYSTEM_PROMPT, SYSTEM_PROMPT, copyedit
+from copyedit_ai.copyedit import (
+    JSON_SYSTEM_PROMPT,
+    SYSTEM_PROMPT,
+    copyedit,
+    copyedit_async,
+    load_template,
+    templates_installed,
+)
+from tests.stubs import ResponseStub
+
+# Lowercased once for the case-insensitive prompt content checks
+_LOWER_PROMPT = SYSTEM_PROMPT.lower()
+
+
+@pytest.fixture
+def mock_llm(monkeypatch: pytest.MonkeyPatch):
+    """Patch llm's model lookup functions for testing."""
+    fake = SimpleNamespace(get_model=MagicMock(), get_async_model=MagicMock())
+    monkeypatch.setattr(llm, "get_model", fake.get_model)
+    monkeypatch.setattr(llm, "get_async_model", fake.get_async_model)
+    return fake
 
 
 @pytest.fixture
@@ -18,159 +42,153 @@ def mock_llm_model():
 @pytest.fixture
 def mock_llm_response():
     """Mock LLM response for testing."""
-    response = MagicMock()
-    response.text.return_value = "Corrected text\n\n===\n\n- Fixed typo"
-    response.__iter__ = MagicMock(return_value=iter(["Corrected", " text"]))
-    return response
+    return ResponseStub(["Corrected", " text"])
 
 
 @pytest.fixture
 def mock_template():
     """Mock template for testing."""
-    template = MagicMock()
-    template.system = SYSTEM_PROMPT
-    return template
+    return SimpleNamespace(system=SYSTEM_PROMPT)
 
 
 def test_system_prompt_exists():
     """Test that the system prompt is defined."""
     assert SYSTEM_PROMPT
-    assert "copy editor" in SYSTEM_PROMPT.lower()
-    assert "punctuation" in SYSTEM_PROMPT.lower()
-    assert "grammatical" in SYSTEM_PROMPT.lower()
+    assert "copy editor" in _LOWER_PROMPT
+    assert "punctuation" in _LOWER_PROMPT
+    assert "grammatical" in _LOWER_PROMPT
 
 
 def test_system_prompt_includes_frontmatter_protection():
     """Test that the system prompt includes instructions to protect front matter."""
     assert SYSTEM_PROMPT
     # Check for general front matter protection instruction
-    assert "front matter" in SYSTEM_PROMPT.lower()
-    assert "unmodified" in SYSTEM_PROMPT.lower()
+    assert "front matter" in _LOWER_PROMPT
+    assert "unmodified" in _LOWER_PROMPT
 
     # Check for YAML front matter delimiters
     assert "---" in SYSTEM_PROMPT
-    assert "YAML" in SYSTEM_PROMPT or "yaml" in SYSTEM_PROMPT.lower()
+    assert "YAML" in SYSTEM_PROMPT or "yaml" in _LOWER_PROMPT
 
     # Check for TOML front matter delimiters
     assert "+++" in SYSTEM_PROMPT
-    assert "TOML" in SYSTEM_PROMPT or "toml" in SYSTEM_PROMPT.lower()
+    assert "TOML" in SYSTEM_PROMPT or "toml" in _LOWER_PROMPT
 
     # Check for JSON front matter delimiters
     assert "{" in SYSTEM_PROMPT
     assert "}" in SYSTEM_PROMPT
-    assert "JSON" in SYSTEM_PROMPT or "json" in SYSTEM_PROMPT.lower()
+    assert "JSON" in SYSTEM_PROMPT or "json" in _LOWER_PROMPT
 
 
+@pytest.mark.parametrize(
+    ("model_name", "stream", "get_model_args"),
+    [
+        ("gpt-4o", False, ("gpt-4o",)),
+        (None, False, ()),
+        (None, True, ()),
+    ],
+)
 @patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
-def test_copyedit_with_model_name(
-    mock_llm, mock_load_template, mock_llm_model, mock_llm_response, mock_template
+def test_copyedit(  # noqa: PLR0913
+    mock_load_template,
+    mock_llm,
+    mock_llm_model,
+    mock_llm_response,
+    mock_template,
+    model_name: str | None,
+    stream: bool,
+    get_model_args: tuple[str, ...],
 ):
-    """Test copyedit with a specific model name."""
+    """Test copyedit with and without a model name, streaming or not."""
     mock_llm.get_model.return_value = mock_llm_model
     mock_llm_model.prompt.return_value = mock_llm_response
     mock_load_template.return_value = mock_template
 
     text = "This is a test text with some erors."
-    model_name = "gpt-4o"
 
-    copyedit(text, model_name=model_name, stream=False)
+    response = copyedit(text, model_name=model_name, stream=stream)
 
-    mock_llm.get_model.assert_called_once_with(model_name)
-    mock_llm_model.prompt.assert_called_once()
+    # Streaming or not, the model's response is returned as-is
+    assert response is mock_llm_response
+    # Without a model name, llm's default model is used
+    assert mock_llm.get_model.call_count == 1
+    assert mock_llm.get_model.call_args == call(*get_model_args)
+    assert mock_llm_model.prompt.call_count == 1
 
     # Verify the prompt includes our text and uses the system prompt
-    call_args = mock_llm_model.prompt.call_args
-    assert "Copy edit the text that follows:" in call_args[0][0]
-    assert text in call_args[0][0]
-    assert call_args[1]["system"] == SYSTEM_PROMPT
+    prompt_text = mock_llm_model.prompt.call_args.args[0]
+    prompt_kwargs = mock_llm_model.prompt.call_args.kwargs
+    assert "Copy edit the text that follows:" in prompt_text
+    assert text in prompt_text
+    assert prompt_kwargs["system"] == SYSTEM_PROMPT
+    assert prompt_kwargs["stream"] is stream
 
 
 @patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
-def test_copyedit_without_model_name(
-    mock_llm, mock_load_template, mock_llm_model, mock_llm_response, mock_template
-):
-    """Test copyedit without specifying a model name."""
-    mock_llm.get_model.return_value = mock_llm_model
-    mock_llm_model.prompt.return_value = mock_llm_response
-    mock_load_template.return_value = mock_template
-
-    text = "Test text."
-
-    copyedit(text, model_name=None, stream=False)
-
-    # Should call get_model without arguments
-    mock_llm.get_model.assert_called_once_with()
-    mock_llm_model.prompt.assert_called_once()
-
-
-@patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
-def test_copyedit_streaming(
-    mock_llm, mock_load_template, mock_llm_model, mock_llm_response, mock_template
+def test_copyedit_with_structured_output(
+    mock_load_template,
+    mock_llm,
+    mock_llm_model,
+    mock_llm_response,
+    mock_template,
 ):
-    """Test copyedit with streaming enabled."""
+    """Pass a schema to llm and use the structured-output system prompt."""
     mock_llm.get_model.return_value = mock_llm_model
     mock_llm_model.prompt.return_value = mock_llm_response
     mock_load_template.return_value = mock_template
+    schema = {
+        "type": "object",
+        "properties": {"copyedited_text": {"type": "string"}},
+    }
 
-    text = "Test text."
-
-    response = copyedit(text, stream=True)
+    copyedit("Test text.", stream=False, schema=schema)
 
-    # Response should be the same object (streaming is handled by the response)
-    assert response == mock_llm_response
+    call_args = mock_llm_model.prompt.call_args
+    assert call_args[1]["schema"] == schema
+    assert call_args[1]["stream"] is False
+    assert call_args[1]["system"] == JSON_SYSTEM_PROMPT
 
 
 @patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
-def test_copyedit_no_streaming(
-    mock_llm, mock_load_template, mock_llm_model, mock_llm_response, mock_template
+def test_copyedit_async_with_model_name(
+    mock_load_template, mock_llm, mock_llm_model, mock_llm_response, mock_template
 ):
-    """Test copyedit with streaming disabled."""
-    mock_llm.get_model.return_value = mock_llm_model
+    """Test copyedit_async looks up an async model by name."""
+    mock_llm.get_async_model.return_value = mock_llm_model
     mock_llm_model.prompt.return_value = mock_llm_response
     mock_load_template.return_value = mock_template
 
-    text = "Test text."
+    text = "This is a test text with some erors."
 
-    response = copyedit(text, stream=False)
+    response = copyedit_async(text, "gpt-4o", stream=False)
 
-    # Response should be the same object
     assert response == mock_llm_response
+    mock_llm.get_async_model.assert_called_once_with("gpt-4o")
+    mock_llm.get_model.assert_not_called()
+    call_args = mock_llm_model.prompt.call_args
+    assert text in call_args[0][0]
+    assert call_args[1]["system"] == SYSTEM_PROMPT
+    assert call_args[1]["stream"] is False
 
 
 @patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
-def test_copyedit_with_structured_output(
-    mock_llm,
-    mock_load_template,
-    mock_llm_model,
-    mock_llm_response,
-    mock_template,
+def test_copyedit_async_reuses_model_instance(
+    mock_load_template, mock_llm, mock_llm_model, mock_llm_response, mock_template
 ):
-    """Pass a schema to llm and use the structured-output system prompt."""
-    mock_llm.get_model.return_value = mock_llm_model
+    """Test copyedit_async uses a provided model instance without a lookup."""
     mock_llm_model.prompt.return_value = mock_llm_response
     mock_load_template.return_value = mock_template
-    schema = {
-        "type": "object",
-        "properties": {"copyedited_text": {"type": "string"}},
-    }
 
-    copyedit("Test text.", stream=False, schema=schema)
+    copyedit_async("Test text.", mock_llm_model)
 
-    call_args = mock_llm_model.prompt.call_args
-    assert call_args[1]["schema"] == schema
-    assert call_args[1]["stream"] is False
-    assert call_args[1]["system"] == JSON_SYSTEM_PROMPT
+    mock_llm.get_async_model.assert_not_called()
+    mock_llm_model.prompt.assert_called_once()
+    assert mock_llm_model.prompt.call_args[1]["stream"] is True
 
 
 @patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
 def test_copyedit_with_yaml_frontmatter(
-    mock_llm, mock_load_template, mock_llm_model, mock_llm_response, mock_template
+    mock_load_template, mock_llm, mock_llm_model, mock_llm_response, mock_template
 ):
     """Test copyedit with YAML front matter."""
     mock_llm.get_model.return_value = mock_llm_model
@@ -197,9 +215,8 @@ This is a test text with some erors."""
 
 
 @patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
 def test_copyedit_with_toml_frontmatter(
-    mock_llm, mock_load_template, mock_llm_model, mock_llm_response, mock_template
+    mock_load_template, mock_llm, mock_llm_model, mock_llm_response, mock_template
 ):
     """Test copyedit with TOML front matter."""
     mock_llm.get_model.return_value = mock_llm_model
@@ -226,9 +243,8 @@ This is a test text with some erors."""
 
 
 @patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
 def test_copyedit_with_json_frontmatter(
-    mock_llm, mock_load_template, mock_llm_model, mock_llm_response, mock_template
+    mock_load_template, mock_llm, mock_llm_model, mock_llm_response, mock_template
 ):
     """Test copyedit with JSON front matter."""
     mock_llm.get_model.return_value = mock_llm_model
@@ -255,9 +271,8 @@ This is a test text with some erors."""
 
 
 @patch("copyedit_ai.copyedit.load_template")
-@patch("copyedit_ai.copyedit.llm")
 def test_copyedit_with_complex_yaml_frontmatter(
-    mock_llm, mock_load_template, mock_llm_model, mock_llm_response, mock_template
+    mock_load_template, mock_llm, mock_llm_model, mock_llm_response, mock_template
 ):
     """Test copyedit with complex YAML front matter including nested structures."""
     mock_llm.get_model.return_value = mock_llm_model
@@ -290,3 +305,110 @@ This is a test document with erors that need to be corrected."""
     assert "title: My Complex Document" in call_args[0][0]
     assert "tags:" in call_args[0][0]
     assert "# Introduction" in call_args[0][0]
+
+
+@patch("copyedit_ai.copyedit.load_template")
+def test_copyedit_with_cache_reuses_response(
+    mock_load_template, mock_llm, mock_llm_model, mock_template
+):
+    """Test that a cached response is served without calling the model."""
+    mock_llm.get_model.return_value = mock_llm_model
+    mock_llm_model.prompt.return_value = iter(["Corrected", " text"])
+    mock_load_template.return_value = mock_template
+
+    first = copyedit("Some text.", cache=True)
+    assert "".join(first) == "Corrected text"
+    first.save()
+
+    second = copyedit("Some text.", cache=True)
+    assert "".join(second) == "Corrected text"
+    mock_llm_model.prompt.assert_called_once()
+
+    # Different text is a different request
+    mock_llm_model.prompt.reset_mock()
+    mock_llm_model.prompt.return_value = iter(["Other"])
+    assert "".join(copyedit("Other text.", cache=True)) == "Other"
+    mock_llm_model.prompt.assert_called_once()
+
+
+@patch("copyedit_ai.copyedit.load_template")
+def test_copyedit_with_cache_waits_for_save(
+    mock_load_template, mock_llm, mock_llm_model, mock_template
+):
+    """Test that a response is only cached once the caller saves it."""
+    mock_llm.get_model.return_value = mock_llm_model
+    mock_load_template.return_value = mock_template
+
+    mock_llm_model.prompt.return_value = iter(["Unchecked"])
+    assert "".join(copyedit("Some text.", cache=True)) == "Unchecked"
+
+    # Never saved, so the model is asked again
+    mock_llm_model.prompt.return_value = iter(["Corrected"])
+    assert "".join(copyedit("Some text.", cache=True)) == "Corrected"
+    assert mock_llm_model.prompt.call_count == 2  # noqa: PLR2004
+
+
+@pytest.fixture
+def templates_dir(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """Point llm's user directory at tmp_path and return its templates dir."""
+    monkeypatch.setenv("LLM_USER_PATH", str(tmp_path))
+    path = tmp_path / "templates"
+    path.mkdir()
+    return path
+
+
+def test_load_template_is_cached_until_file_changes(templates_dir):
+    """Test that templates are parsed once and reloaded after an edit."""
+    template_path = templates_dir / "copyedit.yaml"
+    template_path.write_text("system: First prompt\n")
+
+    with patch("llm.cli.load_template", wraps=llm_load_template) as llm_load:
+        first = load_template("copyedit")
+        assert first.system == "First prompt"
+        assert load_template("copyedit") == first
+        llm_load.assert_called_once()
+
+        template_path.write_text("system: Second prompt\n")
+        stat = template_path.stat()
+        os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        second = load_template("copyedit")
+        assert second.system == "Second prompt"
+        assert llm_load.call_count == 2  # noqa: PLR2004
+
+
+def test_load_template_copies_do_not_share_mutations(templates_dir):
+    """Test that changing one loaded template doesn't affect later loads."""
+    (templates_dir / "copyedit.yaml").write_text(
+        "system: Prompt\ndefaults:\n  tone: formal\n"
+    )
+
+    first = load_template("copyedit")
+    first.system = "Changed"
+    first.defaults["tone"] = "casual"
+
+    second = load_template("copyedit")
+    assert second is not first
+    assert second.system == "Prompt"
+    assert second.defaults == {"tone": "formal"}
+
+
+def test_templates_installed_lists_valid_templates(templates_dir):
+    """Test that templates_installed summarizes the valid YAML templates."""
+    (templates_dir / "copyedit.yaml").write_text("system: Fix errors\n")
+    (templates_dir / "haiku.yaml").write_text("Write a haiku\n")
+    (templates_dir / "broken.yaml").write_text("system: [unclosed\n")
+    (templates_dir / "list.yaml").write_text("- not\n- a mapping\n")
+    (templates_dir / "notes.txt").write_text("not a template\n")
+
+    assert templates_installed() == {
+        "copyedit": "system: Fix errors",
+        "haiku": "Write a haiku",
+    }
+
+
+def test_templates_installed_without_templates_dir(tmp_path, monkeypatch):
+    """Test that a missing templates directory means no templates."""
+    monkeypatch.setenv("LLM_USER_PATH", str(tmp_path))
+
+    assert templates_installed() == {}
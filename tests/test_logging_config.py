@@ -69,7 +69,7 @@ def test_default_loguru_config_with_file(tmp_path: Path):
     # Second handler is file
     assert config["handlers"][1]["sink"] == log_file
     assert config["handlers"][1]["level"] == "DEBUG"
-    assert config["handlers"][1]["enqueue"] is False
+    assert config["handlers"][1]["enqueue"] is True
 
 
 def test_default_loguru_config_creates_parent_dirs(tmp_path: Path):
@@ -95,7 +95,7 @@ def test_load_external_config_file_exists(tmp_path: Path):
     }
     config_file.write_text(json.dumps(config_data))
 
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         result = logging_config._load_external_config(config_file)  # noqa: SLF001
 
         assert result is True
@@ -113,7 +113,7 @@ def test_load_external_config_file_not_exists(tmp_path: Path):
 
 def test_setup_logging_default_level(tmp_path: Path):
     """Test setup_logging uses INFO level by default."""
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(tmp_path)
 
         mock_load.assert_called_once()
@@ -123,7 +123,7 @@ def test_setup_logging_default_level(tmp_path: Path):
 
 def test_setup_logging_verbose_mode(tmp_path: Path):
     """Test setup_logging uses DEBUG level when verbose=True."""
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(tmp_path, verbose=True)
 
         config = mock_load.call_args[0][0]
@@ -132,7 +132,7 @@ def test_setup_logging_verbose_mode(tmp_path: Path):
 
 def test_setup_logging_quiet_mode(tmp_path: Path):
     """Test setup_logging uses ERROR level when quiet=True."""
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(tmp_path, quiet=True)
 
         config = mock_load.call_args[0][0]
@@ -141,7 +141,7 @@ def test_setup_logging_quiet_mode(tmp_path: Path):
 
 def test_setup_logging_quiet_overrides_verbose(tmp_path: Path):
     """Test setup_logging quiet takes precedence over verbose."""
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(tmp_path, verbose=True, quiet=True)
 
         config = mock_load.call_args[0][0]
@@ -152,7 +152,7 @@ def test_setup_logging_with_file_logging_enabled(tmp_path: Path):
     """Test setup_logging with file logging explicitly enabled."""
     log_file = tmp_path / "test.log"
 
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(
             tmp_path, log_file=log_file, enable_file_logging=True
         )
@@ -165,7 +165,7 @@ def test_setup_logging_with_file_logging_disabled(tmp_path: Path):
     """Test setup_logging with file logging explicitly disabled."""
     log_file = tmp_path / "test.log"
 
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(
             tmp_path, log_file=log_file, enable_file_logging=False
         )
@@ -179,7 +179,7 @@ def test_setup_logging_with_file_logging_none(tmp_path: Path):
     """Test setup_logging with None for enable_file_logging parameter."""
     log_file = tmp_path / "test.log"
 
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(
             tmp_path, log_file=log_file, enable_file_logging=None
         )
@@ -197,7 +197,7 @@ def test_setup_logging_loads_env_config(tmp_path: Path, monkeypatch):
     config_file.write_text(json.dumps(config_data))
     monkeypatch.setenv("COPYEDIT_LOG_CONFIG", str(config_file))
 
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(tmp_path)
 
         # Should load from env var, not call default config
@@ -210,7 +210,7 @@ def test_setup_logging_loads_app_dir_config(tmp_path: Path):
     config_data = {"handlers": [{"sink": "sys.stderr", "level": "WARNING"}]}
     config_file.write_text(json.dumps(config_data))
 
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(tmp_path)
 
         # Should load from app_dir config file
@@ -227,7 +227,7 @@ def test_setup_logging_env_config_takes_precedence(tmp_path: Path, monkeypatch):
 
     monkeypatch.setenv("COPYEDIT_LOG_CONFIG", str(env_config))
 
-    with patch("copyedit_ai.logging_config.LoguruConfig.load") as mock_load:
+    with patch("loguru_config.loguru_config.LoguruConfig.load") as mock_load:
         logging_config.setup_logging(tmp_path)
 
         # Should load env config, not app config
@@ -1,12 +1,18 @@
 """Tests for user_dir module."""
 
 import os
+import stat
 from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import patch
 
 import pytest
 
 from copyedit_ai import user_dir
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
 
 def test_get_xdg_config_home_with_env_var(monkeypatch) -> None:
     """Test get_xdg_config_home when XDG_CONFIG_HOME is set."""
@@ -27,57 +33,95 @@ def test_get_xdg_config_home_without_env_var(monkeypatch) -> None:
     assert result == Path.home() / ".config"
 
 
-def test_get_app_config_dir(monkeypatch) -> None:
-    """Test get_app_config_dir returns correct path."""
+@pytest.mark.parametrize(
+    ("get_dir", "relative"),
+    [
+        (user_dir.get_app_config_dir, "dev.pirateninja.copyedit_ai"),
+        (user_dir.get_llm_config_dir, "dev.pirateninja.copyedit_ai/llm_config"),
+    ],
+)
+def test_get_config_dirs(
+    monkeypatch, get_dir: "Callable[[], Path]", relative: str
+) -> None:
+    """Test the app and llm config directories live under XDG_CONFIG_HOME."""
     test_path = "/custom/config"
     monkeypatch.setenv("XDG_CONFIG_HOME", test_path)
 
-    result = user_dir.get_app_config_dir()
+    assert get_dir() == Path(test_path) / relative
 
-    expected = Path(test_path) / "dev.pirateninja.copyedit_ai"
-    assert result == expected
 
+def test_config_dirs_resolved_once(monkeypatch) -> None:
+    """Test that config directories are cached but follow XDG_CONFIG_HOME."""
+    user_dir._clear_path_cache()  # noqa: SLF001
+    monkeypatch.setenv("XDG_CONFIG_HOME", "/first")
 
-def test_get_llm_config_dir(monkeypatch) -> None:
-    """Test get_llm_config_dir returns correct path."""
-    test_path = "/custom/config"
-    monkeypatch.setenv("XDG_CONFIG_HOME", test_path)
+    first = user_dir.get_llm_config_dir()
+    assert user_dir.get_llm_config_dir() is first
+    assert user_dir._config_dirs.cache_info().misses == 1  # noqa: SLF001
 
-    result = user_dir.get_llm_config_dir()
+    monkeypatch.setenv("XDG_CONFIG_HOME", "/second")
 
-    expected = Path(test_path) / "dev.pirateninja.copyedit_ai" / "llm_config"
-    assert result == expected
+    assert user_dir.get_app_config_dir() == Path("/second") / user_dir.APP_IDENTIFIER
 
 
-def test_is_initialized_false(tmp_path: Path, monkeypatch) -> None:
-    """Test is_initialized returns False when directory doesn't exist."""
-    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+def test_get_app_cache_dir(monkeypatch) -> None:
+    """Test get_app_cache_dir honours XDG_CACHE_HOME."""
+    test_path = "/custom/cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", test_path)
 
-    result = user_dir.is_initialized()
+    result = user_dir.get_app_cache_dir()
 
-    assert result is False
+    assert result == Path(test_path) / "dev.pirateninja.copyedit_ai"
 
 
-def test_is_initialized_true(tmp_path: Path, monkeypatch) -> None:
-    """Test is_initialized returns True when directory exists."""
-    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+def test_get_app_cache_dir_is_cached(monkeypatch) -> None:
+    """Test that the cache directory is cached but follows XDG_CACHE_HOME."""
+    user_dir._clear_path_cache()  # noqa: SLF001
+    monkeypatch.setenv("XDG_CACHE_HOME", "/first")
 
-    # Create the directory structure
-    llm_config_dir = tmp_path / "dev.pirateninja.copyedit_ai" / "llm_config"
-    llm_config_dir.mkdir(parents=True)
+    first = user_dir.get_app_cache_dir()
+    assert user_dir.get_app_cache_dir() is first
+    assert user_dir._cache_dir.cache_info().misses == 1  # noqa: SLF001
 
-    result = user_dir.is_initialized()
+    monkeypatch.setenv("XDG_CACHE_HOME", "/second")
 
-    assert result is True
+    assert user_dir.get_app_cache_dir() == Path("/second") / user_dir.APP_IDENTIFIER
 
 
-def test_initialize_creates_directories(tmp_path: Path, monkeypatch) -> None:
-    """Test initialize creates the directory structure."""
-    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+@pytest.mark.parametrize("exists", [False, True])
+def test_is_initialized(xdg_home: Path, exists: bool) -> None:
+    """Test is_initialized reports whether the llm config directory exists."""
+    if exists:
+        llm_config_dir = xdg_home / "dev.pirateninja.copyedit_ai" / "llm_config"
+        llm_config_dir.mkdir(parents=True)
+
+    assert user_dir.is_initialized() is exists
+
+
+def test_is_initialized_false_for_file(xdg_home: Path) -> None:
+    """Test is_initialized returns False when llm_config is not a directory."""
+    app_dir = xdg_home / "dev.pirateninja.copyedit_ai"
+    app_dir.mkdir()
+    (app_dir / "llm_config").write_text("")
+
+    assert user_dir.is_initialized() is False
 
+
+def test_is_initialized_remembers_directory(xdg_home: Path) -> None:
+    """Test that an existing llm_config directory is only stat'ed once."""
+    (xdg_home / "dev.pirateninja.copyedit_ai" / "llm_config").mkdir(parents=True)
+
+    assert user_dir.is_initialized() is True
+    with patch.object(Path, "stat") as mock_stat:
+        assert user_dir.is_initialized() is True
+    mock_stat.assert_not_called()
+
+
+def test_initialize_creates_directories(xdg_home: Path) -> None:
+    """Test initialize creates the directory structure."""
     user_dir.initialize()
 
-    app_config_dir = tmp_path / "dev.pirateninja.copyedit_ai"
+    app_config_dir = xdg_home / "dev.pirateninja.copyedit_ai"
     llm_config_dir = app_config_dir / "llm_config"
     templates_dir = llm_config_dir / "templates"
 
@@ -89,10 +133,21 @@ def test_initialize_creates_directories(tmp_path: Path, monkeypatch) -> None:
     assert templates_dir.is_dir()
 
 
-def test_initialize_already_initialized(tmp_path: Path, monkeypatch) -> None:
-    """Test initialize when already initialized doesn't fail."""
-    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+def test_initialize_restricts_permissions(xdg_home: Path) -> None:
+    """Test initialize leaves every created directory user-only."""
+    user_dir.initialize()
+
+    app_config_dir = xdg_home / "dev.pirateninja.copyedit_ai"
+    for directory in (
+        app_config_dir,
+        app_config_dir / "llm_config",
+        app_config_dir / "llm_config" / "templates",
+    ):
+        assert stat.S_IMODE(directory.stat().st_mode) == stat.S_IRWXU
 
+
+def test_initialize_already_initialized(xdg_home: Path) -> None:
+    """Test initialize when already initialized doesn't fail."""
     # Initialize once
     user_dir.initialize()
 
@@ -100,19 +155,32 @@ def test_initialize_already_initialized(tmp_path: Path, monkeypatch) -> None:
     user_dir.initialize()
 
     # Directory should still exist
-    llm_config_dir = tmp_path / "dev.pirateninja.copyedit_ai" / "llm_config"
+    llm_config_dir = xdg_home / "dev.pirateninja.copyedit_ai" / "llm_config"
     assert llm_config_dir.exists()
 
 
-def test_initialize_with_force(tmp_path: Path, monkeypatch) -> None:
-    """Test initialize with force=True recreates directories."""
-    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+def test_initialize_skips_mkdir_when_initialized(xdg_home: Path) -> None:
+    """Test that a repeat initialize returns without touching the tree."""
+    user_dir.initialize()
 
+    with (
+        patch.object(Path, "mkdir") as mock_mkdir,
+        patch.object(Path, "chmod") as mock_chmod,
+    ):
+        user_dir.initialize()
+
+    mock_mkdir.assert_not_called()
+    mock_chmod.assert_not_called()
+    assert (xdg_home / "dev.pirateninja.copyedit_ai" / "llm_config").is_dir()
+
+
+def test_initialize_with_force(xdg_home: Path) -> None:
+    """Test initialize with force=True recreates directories."""
     # Initialize once
     user_dir.initialize()
 
     # Create a test file in the directory
-    llm_config_dir = tmp_path / "dev.pirateninja.copyedit_ai" / "llm_config"
+    llm_config_dir = xdg_home / "dev.pirateninja.copyedit_ai" / "llm_config"
     test_file = llm_config_dir / "test.txt"
     test_file.write_text("test content")
 
@@ -125,20 +193,19 @@ def test_initialize_with_force(tmp_path: Path, monkeypatch) -> None:
     assert test_file.exists()
 
 
-def test_set_llm_user_path_sets_env_var(tmp_path: Path, monkeypatch) -> None:
+def test_set_llm_user_path_sets_env_var(xdg_home: Path, monkeypatch) -> None:
     """Test set_llm_user_path sets LLM_USER_PATH environment variable."""
-    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
     monkeypatch.delenv("LLM_USER_PATH", raising=False)
 
     user_dir.set_llm_user_path()
 
-    expected = str(tmp_path / "dev.pirateninja.copyedit_ai" / "llm_config")
+    expected = str(xdg_home / "dev.pirateninja.copyedit_ai" / "llm_config")
     assert os.environ.get("LLM_USER_PATH") == expected
 
 
-def test_set_llm_user_path_respects_existing(tmp_path: Path, monkeypatch) -> None:
+@pytest.mark.usefixtures("xdg_home")
+def test_set_llm_user_path_respects_existing(monkeypatch) -> None:
     """Test set_llm_user_path respects existing LLM_USER_PATH."""
-    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
     existing_path = "/custom/llm/path"
     monkeypatch.setenv("LLM_USER_PATH", existing_path)
 
@@ -148,16 +215,28 @@ def test_set_llm_user_path_respects_existing(tmp_path: Path, monkeypatch) -> Non
     assert os.environ.get("LLM_USER_PATH") == existing_path
 
 
-def test_initialize_permission_error(tmp_path: Path, monkeypatch) -> None:
-    """Test initialize handles permission errors gracefully."""
-    # Skip test if running as root (permissions work differently)
-    if os.getuid() == 0:
-        pytest.skip("Test skipped when running as root")
+def test_set_llm_user_path_repeat_call_is_quiet(xdg_home: Path, monkeypatch) -> None:
+    """Test that a repeat call doesn't treat our own value as an override."""
+    monkeypatch.delenv("LLM_USER_PATH", raising=False)
+    user_dir.set_llm_user_path()
 
-    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    with patch("copyedit_ai.user_dir.logger") as mock_logger:
+        user_dir.set_llm_user_path()
 
+    mock_logger.debug.assert_not_called()
+    expected = str(xdg_home / "dev.pirateninja.copyedit_ai" / "llm_config")
+    assert os.environ.get("LLM_USER_PATH") == expected
+
+
+# Permissions work differently for root
+@pytest.mark.skipif(
+    hasattr(os, "getuid") and os.getuid() == 0,
+    reason="Test skipped when running as root",
+)
+def test_initialize_permission_error(xdg_home: Path) -> None:
+    """Test initialize handles permission errors gracefully."""
     # Make the directory read-only
-    app_config_dir = tmp_path / "dev.pirateninja.copyedit_ai"
+    app_config_dir = xdg_home / "dev.pirateninja.copyedit_ai"
     app_config_dir.mkdir(parents=True)
     app_config_dir.chmod(0o444)  # Read-only
 